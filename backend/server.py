@@ -1,13 +1,57 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional, Dict
-from datetime import datetime
+from starlette.datastructures import MutableHeaders
+from pydantic import BaseModel, Field, ValidationError, confloat
+from typing import List, Optional, Dict, Union
+from datetime import datetime, timedelta
 import os
-from pymongo import MongoClient
+import logging
+import base64
+import asyncio
+import math
+import re
+import time
+import bisect
+import contextvars
+import copy
+import hashlib
+import mmap
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict, defaultdict
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, IndexModel, UpdateOne, monitoring
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure, PyMongoError
+import numpy as np
+import orjson
 import uuid
+import zlib
 
-app = FastAPI()
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# orjson for every response; hot endpoints also return ORJSONResponse directly
+# so their payloads skip jsonable_encoder's deep copy
+app = FastAPI(default_response_class=ORJSONResponse)
+
+# Validation errors echo the input, which may hold NaN or Infinity; orjson
+# writes those as null where the default JSON renderer fails with a 500
+@app.exception_handler(RequestValidationError)
+async def validation_error_handler(request, exc):
+    return ORJSONResponse({"detail": jsonable_encoder(exc.errors())}, status_code=422)
 
 # CORS configuration
 app.add_middleware(
@@ -18,16 +62,1111 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Metrics
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class RequestStats:
+    # Mongo work attributed to one HTTP request
+    __slots__ = ("scope", "db_commands", "db_seconds", "db_command_names", "stale", "lock")
+
+    def __init__(self, scope):
+        self.scope = scope
+        # Motor runs commands, and so the command listener, on executor threads
+        self.lock = threading.Lock()
+        self.db_commands = 0
+        self.db_seconds = 0.0
+        self.db_command_names = defaultdict(int)
+        self.stale = False  # served from a catalog snapshot that could not be revalidated
+
+    @property
+    def route(self):
+        return route_label(self.scope)
+
+current_request = contextvars.ContextVar("current_request", default=None)
+
+def mark_request_stale():
+    # Sets X-Catalog-Stale on the current response
+    stats = current_request.get()
+    if stats is not None:
+        stats.stale = True
+
+def route_label(scope):
+    # Route templates keep label cardinality bounded, unlike raw paths
+    route = scope.get("route")
+    return route.path if route is not None else "unmatched"
+
+def prometheus_labels(names, values):
+    return ",".join(f'{name}="{value}"' for name, value in zip(names, values))
+
+class Metrics:
+    def __init__(self):
+        # Command events arrive on Motor's executor threads
+        self._lock = threading.Lock()
+        self.requests = defaultdict(int)
+        self.histograms = defaultdict(dict)
+        self.db_commands = defaultdict(int)
+        self.db_command_seconds = defaultdict(float)
+        self.db_command_failures = defaultdict(int)
+        # Callables returning extra exposition lines (caches, coalescers, ...)
+        self.collectors = []
+
+    def register(self, collector):
+        self.collectors.append(collector)
+        return collector
+
+    def _observe(self, name, labels, bounds, value):
+        histogram = self.histograms[name].get(labels)
+        if histogram is None:
+            histogram = self.histograms[name][labels] = Histogram(bounds)
+        histogram.observe(value)
+
+    def observe_request(self, method, route, status, seconds, stats, request_bytes, response_bytes):
+        labels = (method, route)
+        with self._lock:
+            self.requests[(method, route, status)] += 1
+            self._observe("http_request_duration_seconds", labels, LATENCY_BUCKETS, seconds)
+            self._observe("http_request_db_commands", labels, COUNT_BUCKETS, stats.db_commands)
+            self._observe("http_request_db_seconds", labels, LATENCY_BUCKETS, stats.db_seconds)
+            self._observe("http_request_size_bytes", labels, SIZE_BUCKETS, request_bytes)
+            self._observe("http_response_size_bytes", labels, SIZE_BUCKETS, response_bytes)
+
+    def observe_command(self, route, command, seconds, failed):
+        key = (route, command)
+        with self._lock:
+            self.db_commands[key] += 1
+            self.db_command_seconds[key] += seconds
+            if failed:
+                self.db_command_failures[key] += 1
+
+    def render(self):
+        lines = []
+        with self._lock:
+            lines.append("# TYPE http_requests_total counter")
+            for labels, value in sorted(self.requests.items()):
+                lines.append(f"http_requests_total{{{prometheus_labels(('method', 'route', 'status'), labels)}}} {value}")
+            for name, series in sorted(self.histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in sorted(series.items()):
+                    base = prometheus_labels(("method", "route"), labels)
+                    cumulative = 0
+                    for bound, count in zip(histogram.bounds + ("+Inf",), histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{{base},le="{bound}"}} {cumulative}')
+                    lines.append(f"{name}_sum{{{base}}} {histogram.sum}")
+                    lines.append(f"{name}_count{{{base}}} {histogram.count}")
+            for name, table in (
+                ("mongo_commands_total", self.db_commands),
+                ("mongo_command_seconds_total", self.db_command_seconds),
+                ("mongo_command_failures_total", self.db_command_failures),
+            ):
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in sorted(table.items()):
+                    lines.append(f"{name}{{{prometheus_labels(('route', 'command'), labels)}}} {value}")
+        for collector in self.collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics()
+
+# Query budgets: the most store round trips a single request to a route may
+# make. Exceeding one logs a warning and marks the response with
+# X-Query-Budget-Exceeded; with QUERY_BUDGET_MODE=raise the request fails
+# with a 500 instead (set it in test runs so N+1 regressions fail the
+# suite). None disables the check for routes whose work scales with the payload.
+QUERY_BUDGET_MODE = os.environ.get('QUERY_BUDGET_MODE', 'warn')
+DEFAULT_QUERY_BUDGET = int(os.environ.get('DEFAULT_QUERY_BUDGET', '5'))
+QUERY_BUDGETS = {
+    "/api/health": 0,
+    "/api/metrics": 0,
+    # Catalog readers: a version check plus one load per collection when the
+    # catalog changed (a cold price index costs one $in query per collection)
+    "/api/venues": 4,
+    "/api/cuisine-options": 4,
+    "/api/services": 4,
+    "/api/calculate-budget": 4,
+    "/api/bootstrap": 4,
+    "/api/calculate-budget/batch": 4,
+    "/api/optimize-plan": 4,
+    "/api/cost-curve": 4,
+    "/api/tiers": 4,
+    "/api/wedding-plan": 1,
+    "/api/wedding-plan/{plan_id}": 1,
+    "/api/wedding-plans": 1,
+    "/api/wedding-plans/import": None,
+    "/api/wedding-plans/export": None,
+}
+
+def query_budget_overrun(route, stats):
+    # Describes the overrun, or returns None while the request is within budget
+    budget = QUERY_BUDGETS.get(route, DEFAULT_QUERY_BUDGET)
+    if budget is None or stats.db_commands <= budget:
+        return None
+    commands = ", ".join(f"{name} x{count}" for name, count in sorted(stats.db_command_names.items()))
+    return f"{route} made {stats.db_commands} store round trips (budget {budget}): {commands}"
+
+def record_db_command(command, seconds=0.0, failed=False):
+    # One storage round trip, attributed to the current request if any
+    stats = current_request.get()
+    if stats is not None:
+        with stats.lock:
+            stats.db_commands += 1
+            stats.db_seconds += seconds
+            stats.db_command_names[command] += 1
+    metrics.observe_command(stats.route if stats else "background", command, seconds, failed)
+
+class MongoCommandListener(monitoring.CommandListener):
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        record_db_command(event.command_name, event.duration_micros / 1e6, False)
+
+    def failed(self, event):
+        record_db_command(event.command_name, event.duration_micros / 1e6, True)
+
+class MetricsMiddleware:
+    # Plain ASGI middleware so the request context (and with it the
+    # current_request var) is shared with the endpoint and Mongo calls
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        stats = RequestStats(scope)
+        token = current_request.set(stats)
+        started = time.perf_counter()
+        status = 500
+        response_bytes = 0
+        overrun = None
+
+        async def send_with_metrics(message):
+            nonlocal status, response_bytes, overrun
+            if message["type"] == "http.response.start":
+                # Checked before the status goes out, so the client sees overruns
+                overrun = query_budget_overrun(stats.route, stats)
+                if overrun and QUERY_BUDGET_MODE == "raise":
+                    logger.error(overrun)
+                    body = encode_json({"detail": overrun})
+                    status = 500
+                    response_bytes = len(body)
+                    await send({"type": "http.response.start", "status": 500, "headers": [
+                        (b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]})
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                headers = list(message.get("headers", []))
+                if overrun:
+                    logger.warning(overrun)
+                    headers.append((b"x-query-budget-exceeded", b"true"))
+                if stats.stale:
+                    headers.append((b"x-catalog-stale", b"true"))
+                status = message["status"]
+                message["headers"] = headers
+            elif message["type"] == "http.response.body":
+                if overrun and QUERY_BUDGET_MODE == "raise":
+                    return  # replaced by the error response above
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            current_request.reset(token)
+            request_bytes = 0
+            for name, value in scope["headers"]:
+                if name == b"content-length":
+                    request_bytes = int(value)
+            metrics.observe_request(scope["method"], stats.route, status, time.perf_counter() - started,
+                                    stats, request_bytes, response_bytes)
+        if overrun is None:
+            # Streamed bodies keep querying after the status is sent; those
+            # overruns can only be logged
+            late = query_budget_overrun(stats.route, stats)
+            if late:
+                logger.log(logging.ERROR if QUERY_BUDGET_MODE == "raise" else logging.WARNING, late)
+
+# Response compression: gzip, or brotli when installed and preferred by the
+# client. Bodies under the threshold are sent as is; responses that already
+# carry a Content-Encoding (pre-compressed catalog payloads) pass through.
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', '1024'))
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+def negotiate_encoding(accept_encoding):
+    offered = {}
+    for part in (accept_encoding or "").lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        offered[name.strip()] = quality
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    candidates = [name for name in candidates if offered.get(name, offered.get("*", 0)) > 0]
+    return max(candidates, key=lambda name: offered.get(name, offered.get("*", 0)), default=None)
+
+def compress_body(body, encoding, level=None):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY if level is None else level)
+    compressor = zlib.compressobj(GZIP_LEVEL if level is None else level, zlib.DEFLATED, 31)
+    return compressor.compress(body) + compressor.flush()
+
+class StreamCompressor:
+    def __init__(self, encoding):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+            self.compress, self.finish = self._compressor.process, self._compressor.finish
+        else:
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+            self.compress, self.finish = self._compressor.compress, self._compressor.flush
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size=COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        accept_encoding = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+        encoding = negotiate_encoding(accept_encoding)
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start = None
+        compressor = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                return await send(message)
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is not None:
+                data = compressor.compress(body)
+                if not more_body:
+                    data += compressor.finish()
+                return await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+            # First body message: decide once for the whole response
+            headers = MutableHeaders(raw=start["headers"])
+            content_type = headers.get("content-type", "")
+            if ("content-encoding" in headers or not content_type.startswith(COMPRESSIBLE_TYPES)
+                    or (not more_body and len(body) < self.minimum_size)):
+                passthrough = True
+                await send(start)
+                return await send(message)
+
+            headers["Content-Encoding"] = encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                # Streaming responses (NDJSON) are compressed chunk by chunk
+                del headers["content-length"]
+                compressor = StreamCompressor(encoding)
+                data = compressor.compress(body)
+            else:
+                data = compress_body(body, encoding)
+                headers["Content-Length"] = str(len(data))
+            await send(start)
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)
+
+# Storage backend: mongo (default), sqlite or memory
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'mongo')
+SQLITE_PATH = os.environ.get('SQLITE_PATH', 'wedding_planner.db')
+
 # MongoDB connection
 MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017/wedding_planner')
-client = MongoClient(MONGO_URL)
-db = client.get_database()
+MONGO_POOL_OPTIONS = {
+    "maxPoolSize": int(os.environ.get('MONGO_MAX_POOL_SIZE', '100')),
+    "minPoolSize": int(os.environ.get('MONGO_MIN_POOL_SIZE', '0')),
+    "maxIdleTimeMS": int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', '60000')),
+    "waitQueueTimeoutMS": int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', '5000')),
+    "connectTimeoutMS": int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', '5000')),
+    "socketTimeoutMS": int(os.environ.get('MONGO_SOCKET_TIMEOUT_MS', '10000')),
+    "serverSelectionTimeoutMS": int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000')),
+}
+
+PRICE_PROJECTION = {"_id": 0, "id": 1, "name": 1}
+# Fields stored only to support queries, never returned to clients
+CATALOG_PROJECTION = {"_id": 0, "max_capacity": 0}
+
+# Indexes every collection must have, keyed by collection name
+INDEX_SPEC = {
+    "venues": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("price", ASCENDING), ("id", ASCENDING)], name="price_id"),
+        IndexModel([("max_capacity", ASCENDING)], name="max_capacity"),
+    ],
+    "cuisine_options": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("price_per_plate", ASCENDING), ("id", ASCENDING)], name="price_per_plate_id"),
+        IndexModel([("cuisine_type", ASCENDING), ("price_per_plate", ASCENDING)], name="cuisine_type_price_per_plate"),
+    ],
+    "service_categories": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("price", ASCENDING), ("id", ASCENDING)], name="price_id"),
+        IndexModel([("category", ASCENDING), ("price", ASCENDING)], name="category_price"),
+        IndexModel([("package_type", ASCENDING), ("price", ASCENDING)], name="package_type_price"),
+    ],
+    "wedding_plans": [
+        IndexModel([("plan_id", ASCENDING)], name="plan_id_unique", unique=True),
+        # Serves every /api/wedding-plans query shape: the sort is the index
+        # order and the range filters are checked on index keys
+        IndexModel([("updated_at", DESCENDING), ("plan_id", DESCENDING), ("guest_count", ASCENDING),
+                    ("total_budget", ASCENDING)], name="plans_listing"),
+    ],
+}
+
+# Backend-neutral description of a catalog listing query
+class CatalogFilter:
+    def __init__(self, price_field, min_price=None, max_price=None, min_capacity=None, equals=None,
+                 sort_field="id", descending=False, after=None, limit=None, fields=None):
+        self.price_field = price_field
+        self.min_price = min_price
+        self.max_price = max_price
+        self.min_capacity = min_capacity
+        self.equals = equals or {}
+        self.sort_field = sort_field
+        self.descending = descending
+        self.after = after  # (sort value, id) of the last item on the previous page
+        self.limit = limit
+        self.fields = fields
+
+    def key(self):
+        # Hashable identity used to coalesce identical concurrent listings
+        return (
+            self.price_field, self.min_price, self.max_price, self.min_capacity,
+            tuple(sorted(self.equals.items())), self.sort_field, self.descending,
+            tuple(self.after) if self.after is not None else None, self.limit,
+            tuple(self.fields) if self.fields else None,
+        )
+
+def mongo_catalog_query(catalog_filter):
+    clauses = [dict(catalog_filter.equals)]
+    price = {}
+    if catalog_filter.min_price is not None:
+        price["$gte"] = catalog_filter.min_price
+    if catalog_filter.max_price is not None:
+        price["$lte"] = catalog_filter.max_price
+    if price:
+        clauses.append({catalog_filter.price_field: price})
+    if catalog_filter.min_capacity is not None:
+        clauses.append({"$or": [{"max_capacity": {"$gte": catalog_filter.min_capacity}}, {"max_capacity": None}]})
+    if catalog_filter.after is not None:
+        value, last_id = catalog_filter.after
+        op = "$lt" if catalog_filter.descending else "$gt"
+        if catalog_filter.sort_field == "id":
+            clauses.append({"id": {op: last_id}})
+        else:
+            clauses.append({"$or": [
+                {catalog_filter.sort_field: {op: value}},
+                {catalog_filter.sort_field: value, "id": {op: last_id}},
+            ]})
+    return {"$and": clauses}
+
+def apply_catalog_filter(items, catalog_filter):
+    # In-process equivalent of mongo_catalog_query plus sort, limit and projection
+    f = catalog_filter
+    selected = []
+    for item in items:
+        if any(item.get(key) != value for key, value in f.equals.items()):
+            continue
+        price = item.get(f.price_field)
+        if f.min_price is not None and (price is None or price < f.min_price):
+            continue
+        if f.max_price is not None and (price is None or price > f.max_price):
+            continue
+        max_capacity = item.get("max_capacity")
+        if f.min_capacity is not None and max_capacity is not None and max_capacity < f.min_capacity:
+            continue
+        if f.after is not None:
+            key = (item.get(f.sort_field), item["id"])
+            after = tuple(f.after)
+            if (key >= after) if f.descending else (key <= after):
+                continue
+        selected.append(item)
+    selected.sort(key=lambda item: (item.get(f.sort_field), item["id"]), reverse=f.descending)
+    if f.limit:
+        selected = selected[:f.limit]
+    if f.fields:
+        keep = ({"id", f.sort_field} | set(f.fields)) - {"max_capacity"}
+    else:
+        keep = None
+    return [
+        {key: value for key, value in item.items() if (key in keep if keep else key != "max_capacity")}
+        for item in selected
+    ]
+
+# Backend-neutral description of a plan listing query; results are always
+# newest first, ordered by (updated_at, plan_id) descending
+PLAN_SUMMARY_FIELDS = ("plan_id", "guest_count", "total_budget", "created_at", "updated_at")
+PLAN_SUMMARY_PROJECTION = {"_id": 0, **{field: 1 for field in PLAN_SUMMARY_FIELDS}}
+
+class PlanFilter:
+    def __init__(self, min_guests=None, max_guests=None, min_budget=None, max_budget=None, after=None, limit=50):
+        self.min_guests = min_guests
+        self.max_guests = max_guests
+        self.min_budget = min_budget
+        self.max_budget = max_budget
+        self.after = after  # (updated_at, plan_id) of the last plan on the previous page
+        self.limit = limit
+
+    def ranges(self):
+        return (("guest_count", self.min_guests, self.max_guests), ("total_budget", self.min_budget, self.max_budget))
+
+def mongo_plan_query(plan_filter):
+    clauses = []
+    for field, low, high in plan_filter.ranges():
+        bounds = {}
+        if low is not None:
+            bounds["$gte"] = low
+        if high is not None:
+            bounds["$lte"] = high
+        if bounds:
+            clauses.append({field: bounds})
+    if plan_filter.after is not None:
+        updated_at, plan_id = plan_filter.after
+        clauses.append({"$or": [
+            {"updated_at": {"$lt": updated_at}},
+            {"updated_at": updated_at, "plan_id": {"$lt": plan_id}},
+        ]})
+    return {"$and": clauses} if clauses else {}
+
+def apply_plan_filter(plans, plan_filter):
+    # In-process equivalent of mongo_plan_query plus sort, limit and projection
+    selected = []
+    for plan in plans:
+        if any(plan.get(field) is None or (low is not None and plan[field] < low) or
+               (high is not None and plan[field] > high)
+               for field, low, high in plan_filter.ranges() if low is not None or high is not None):
+            continue
+        key = (plan.get("updated_at") or "", plan["plan_id"])
+        if plan_filter.after is not None and key >= tuple(plan_filter.after):
+            continue
+        selected.append((key, plan))
+    selected.sort(key=lambda pair: pair[0], reverse=True)
+    return [
+        {field: plan[field] for field in PLAN_SUMMARY_FIELDS if field in plan}
+        for _, plan in selected[:plan_filter.limit]
+    ]
+
+# Data access. Every backend implements the same async interface; endpoints
+# only talk to the module-level `repository`.
+class Repository(ABC):
+    @abstractmethod
+    async def get_catalog_version(self):
+        ...
+
+    @abstractmethod
+    async def bump_catalog_version(self):
+        ...
+
+    @abstractmethod
+    async def get_seed_version(self):
+        ...
+
+    @abstractmethod
+    async def set_seed_version(self, version):
+        ...
+
+    @abstractmethod
+    async def acquire_seed_lock(self, owner, ttl_seconds):
+        ...
+
+    @abstractmethod
+    async def release_seed_lock(self, owner):
+        ...
+
+    @abstractmethod
+    async def upsert_catalog(self, venues, cuisines, services):
+        ...
+
+    @abstractmethod
+    async def load_catalog(self):
+        ...
+
+    @abstractmethod
+    def iter_catalog(self, name, catalog_filter):
+        # Async iterator over the matching items
+        ...
+
+    @abstractmethod
+    async def find_prices(self, venue_id, cuisine_ids, service_ids):
+        ...
+
+    async def ensure_indexes(self, spec):
+        pass
+
+    async def index_report(self, spec):
+        return {}
+
+    @abstractmethod
+    async def save_plan(self, plan_id, plan_data):
+        ...
+
+    @abstractmethod
+    async def get_plan(self, plan_id):
+        ...
+
+    @abstractmethod
+    async def bulk_save_plans(self, plans):
+        ...
+
+    @abstractmethod
+    async def list_plans(self, plan_filter):
+        ...
+
+    @abstractmethod
+    def iter_plans(self, batch_size):
+        # Async iterator over every stored plan, read in batches
+        ...
+
+CATALOG_COLLECTIONS = ("venues", "cuisine_options", "service_categories")
+
+class MongoRepository(Repository):
+    def __init__(self, url, **options):
+        self.client = AsyncIOMotorClient(url, **options)
+        self.db = self.client.get_database()
+
+        # Collections
+        self.wedding_plans = self.db.wedding_plans
+        self.venues = self.db.venues
+        self.cuisine_options = self.db.cuisine_options
+        self.service_categories = self.db.service_categories
+        self.catalog_meta = self.db.catalog_meta
+
+    async def get_catalog_version(self):
+        meta = await self.catalog_meta.find_one({"_id": "catalog"}, {"version": 1})
+        return (meta or {}).get("version", 0)
+
+    async def bump_catalog_version(self):
+        await self.catalog_meta.update_one({"_id": "catalog"}, {"$inc": {"version": 1}}, upsert=True)
+
+    async def get_seed_version(self):
+        meta = await self.catalog_meta.find_one({"_id": "catalog"}, {"seed_version": 1})
+        return (meta or {}).get("seed_version", 0)
+
+    async def set_seed_version(self, version):
+        await self.catalog_meta.update_one({"_id": "catalog"}, {"$set": {"seed_version": version}}, upsert=True)
+
+    async def acquire_seed_lock(self, owner, ttl_seconds):
+        # The upsert only matches an expired lock; a live lock makes it collide on _id
+        now = datetime.utcnow()
+        try:
+            await self.catalog_meta.update_one(
+                {"_id": "seed_lock", "expires_at": {"$lt": now}},
+                {"$set": {"owner": owner, "expires_at": now + timedelta(seconds=ttl_seconds)}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            return False
+        return True
+
+    async def release_seed_lock(self, owner):
+        await self.catalog_meta.delete_one({"_id": "seed_lock", "owner": owner})
+
+    async def upsert_catalog(self, venues, cuisines, services):
+        for collection, items in (
+            (self.venues, venues),
+            (self.cuisine_options, cuisines),
+            (self.service_categories, services),
+        ):
+            operations = [UpdateOne({"id": item["id"]}, {"$set": item}, upsert=True) for item in items]
+            if operations:
+                await collection.bulk_write(operations, ordered=False)
+
+    async def load_catalog(self):
+        venues, cuisines, services = await asyncio.gather(
+            self.venues.find({}, CATALOG_PROJECTION).to_list(length=None),
+            self.cuisine_options.find({}, CATALOG_PROJECTION).to_list(length=None),
+            self.service_categories.find({}, CATALOG_PROJECTION).to_list(length=None),
+        )
+        return venues, cuisines, services
 
-# Collections
-wedding_plans_collection = db.wedding_plans
-venues_collection = db.venues
-cuisine_options_collection = db.cuisine_options
-service_categories_collection = db.service_categories
+    async def iter_catalog(self, name, catalog_filter):
+        if catalog_filter.fields:
+            projection = {"_id": 0, "id": 1, catalog_filter.sort_field: 1, **{f: 1 for f in catalog_filter.fields}}
+            projection.pop("max_capacity", None)
+        else:
+            projection = CATALOG_PROJECTION
+        direction = DESCENDING if catalog_filter.descending else ASCENDING
+        cursor = self.db[name].find(mongo_catalog_query(catalog_filter), projection).sort(
+            [(catalog_filter.sort_field, direction), ("id", direction)])
+        if catalog_filter.limit:
+            cursor = cursor.limit(catalog_filter.limit)
+        async for item in cursor:
+            yield item
+
+    async def find_prices(self, venue_id, cuisine_ids, service_ids):
+        # One query per collection for just the requested ids
+        async def fetch(collection, ids, fields):
+            if not ids:
+                return []
+            return await collection.find(
+                {"id": {"$in": list(set(ids))}}, {**PRICE_PROJECTION, **fields}).to_list(length=None)
+
+        return await asyncio.gather(
+            fetch(self.venues, [venue_id] if venue_id else None, {"price": 1}),
+            fetch(self.cuisine_options, cuisine_ids, {"price_per_plate": 1}),
+            fetch(self.service_categories, service_ids, {"category": 1, "price": 1}),
+        )
+
+    async def ensure_indexes(self, spec):
+        # create_indexes is a no-op for indexes that already exist with the same options
+        for name, indexes in spec.items():
+            try:
+                await self.db[name].create_indexes(indexes)
+            except OperationFailure as e:
+                logger.error("Could not create indexes on %s: %s", name, e)
+
+    async def index_report(self, spec):
+        report = {}
+        for name, indexes in spec.items():
+            collection = self.db[name]
+            declared = {index.document["name"] for index in indexes}
+            existing = set((await collection.index_information()).keys()) - {"_id_"}
+            try:
+                stats = await collection.aggregate([{"$indexStats": {}}]).to_list(length=None)
+                unused = sorted(s["name"] for s in stats if s["name"] != "_id_" and s["accesses"]["ops"] == 0)
+            except OperationFailure:
+                unused = None
+            report[name] = {
+                "missing": sorted(declared - existing),
+                "undeclared": sorted(existing - declared),
+                "unused": unused,
+            }
+        return report
+
+    async def save_plan(self, plan_id, plan_data):
+        await self.wedding_plans.update_one(
+            {"plan_id": plan_id},
+            {"$set": plan_data},
+            upsert=True
+        )
+
+    async def get_plan(self, plan_id):
+        return await self.wedding_plans.find_one({"plan_id": plan_id}, {"_id": 0})
+
+    async def bulk_save_plans(self, plans):
+        # Returns (position in plans, error message) for every plan that failed
+        operations = [UpdateOne({"plan_id": plan["plan_id"]}, {"$set": plan}, upsert=True) for plan in plans]
+        try:
+            await self.wedding_plans.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            return [(error["index"], error["errmsg"]) for error in e.details["writeErrors"]]
+        return []
+
+    async def iter_plans(self, batch_size):
+        async for plan in self.wedding_plans.find({}, {"_id": 0}).batch_size(batch_size):
+            yield plan
+
+    async def list_plans(self, plan_filter):
+        def listing(hint):
+            cursor = self.wedding_plans.find(mongo_plan_query(plan_filter), PLAN_SUMMARY_PROJECTION) \
+                .sort([("updated_at", DESCENDING), ("plan_id", DESCENDING)])
+            if hint:
+                cursor = cursor.hint(hint)
+            return cursor.limit(plan_filter.limit).to_list(length=plan_filter.limit)
+
+        try:
+            return await listing("plans_listing")
+        except OperationFailure as e:
+            # The index is still being built or could not be created; let the
+            # planner choose rather than failing every listing
+            logger.warning("plans_listing hint rejected, listing without it: %s", e)
+            return await listing(None)
+
+class MemoryRepository(Repository):
+    # Everything lives in this process; for tests, benchmarks and demos.
+    # Each call counts as the round trips Mongo would make, so query budgets
+    # hold here too.
+    def __init__(self):
+        self.catalog = {name: {} for name in CATALOG_COLLECTIONS}
+        self.plans = {}
+        self.meta = {"version": 0, "seed_version": 0}
+        self.seed_lock = None
+
+    async def get_catalog_version(self):
+        record_db_command("find")
+        return self.meta["version"]
+
+    async def bump_catalog_version(self):
+        record_db_command("update")
+        self.meta["version"] += 1
+
+    async def get_seed_version(self):
+        record_db_command("find")
+        return self.meta["seed_version"]
+
+    async def set_seed_version(self, version):
+        record_db_command("update")
+        self.meta["seed_version"] = version
+
+    async def acquire_seed_lock(self, owner, ttl_seconds):
+        record_db_command("update")
+        now = time.monotonic()
+        if self.seed_lock and self.seed_lock[1] > now:
+            return False
+        self.seed_lock = (owner, now + ttl_seconds)
+        return True
+
+    async def release_seed_lock(self, owner):
+        record_db_command("delete")
+        if self.seed_lock and self.seed_lock[0] == owner:
+            self.seed_lock = None
+
+    async def upsert_catalog(self, venues, cuisines, services):
+        for name, items in zip(CATALOG_COLLECTIONS, (venues, cuisines, services)):
+            if items:
+                record_db_command("update")
+            for item in items:
+                self.catalog[name].setdefault(item["id"], {}).update(copy.deepcopy(item))
+
+    async def load_catalog(self):
+        for _ in CATALOG_COLLECTIONS:
+            record_db_command("find")
+        return tuple(
+            [{k: v for k, v in item.items() if k != "max_capacity"} for item in copy.deepcopy(list(self.catalog[name].values()))]
+            for name in CATALOG_COLLECTIONS
+        )
+
+    async def iter_catalog(self, name, catalog_filter):
+        record_db_command("find")
+        for item in apply_catalog_filter(copy.deepcopy(list(self.catalog[name].values())), catalog_filter):
+            yield item
+
+    async def find_prices(self, venue_id, cuisine_ids, service_ids):
+        def fetch(name, ids):
+            if ids:
+                record_db_command("find")
+            items = self.catalog[name]
+            return [copy.deepcopy(items[i]) for i in set(ids or ()) if i in items]
+        return (
+            fetch("venues", [venue_id] if venue_id else None),
+            fetch("cuisine_options", cuisine_ids),
+            fetch("service_categories", service_ids),
+        )
+
+    async def save_plan(self, plan_id, plan_data):
+        record_db_command("update")
+        self.plans.setdefault(plan_id, {}).update(copy.deepcopy(plan_data))
+
+    async def get_plan(self, plan_id):
+        record_db_command("find")
+        plan = self.plans.get(plan_id)
+        return copy.deepcopy(plan) if plan is not None else None
+
+    async def bulk_save_plans(self, plans):
+        record_db_command("update")
+        for plan in plans:
+            self.plans.setdefault(plan["plan_id"], {}).update(copy.deepcopy(plan))
+        return []
+
+    async def iter_plans(self, batch_size):
+        record_db_command("find")
+        for plan in list(self.plans.values()):
+            yield copy.deepcopy(plan)
+
+    async def list_plans(self, plan_filter):
+        record_db_command("find")
+        return copy.deepcopy(apply_plan_filter(self.plans.values(), plan_filter))
+
+class SQLiteRepository(Repository):
+    # Embedded single-file store for small edge deployments. Documents are
+    # kept as JSON; calls run on a worker thread to keep the event loop free.
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS catalog (collection TEXT NOT NULL, id TEXT NOT NULL, doc TEXT NOT NULL, "
+        "PRIMARY KEY (collection, id))",
+        "CREATE TABLE IF NOT EXISTS wedding_plans (plan_id TEXT PRIMARY KEY, updated_at TEXT, doc TEXT NOT NULL)",
+        # Mirrors the Mongo plans_listing index; the JSON expressions must match list_plans
+        "CREATE INDEX IF NOT EXISTS wedding_plans_listing ON wedding_plans (updated_at DESC, plan_id DESC, "
+        "json_extract(doc, '$.guest_count'), json_extract(doc, '$.total_budget'))",
+    )
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        for statement in self.SCHEMA:
+            self.conn.execute(statement)
+        self._lock = threading.Lock()
+
+    async def _run(self, command, fn, *args):
+        # `command` names the Mongo command this call stands in for, for
+        # metrics and query budgets
+        def locked():
+            with self._lock:
+                return fn(self.conn, *args)
+        started = time.perf_counter()
+        try:
+            result = await asyncio.to_thread(locked)
+        except Exception:
+            record_db_command(command, time.perf_counter() - started, True)
+            raise
+        record_db_command(command, time.perf_counter() - started)
+        return result
+
+    @staticmethod
+    def _get_meta(conn, key, default):
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return orjson.loads(row[0]) if row else default
+
+    @staticmethod
+    def _set_meta(conn, key, value):
+        conn.execute("INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                     (key, orjson.dumps(value).decode("utf-8")))
+
+    @staticmethod
+    def _merge(conn, select, upsert, key, doc):
+        # Same semantics as a Mongo $set upsert: new fields win, others are kept
+        row = conn.execute(select, key).fetchone()
+        merged = {**orjson.loads(row[0]), **doc} if row else doc
+        conn.execute(upsert, (*key, orjson.dumps(merged).decode("utf-8")))
+
+    async def get_catalog_version(self):
+        return await self._run("find", self._get_meta, "version", 0)
+
+    async def bump_catalog_version(self):
+        def bump(conn):
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._set_meta(conn, "version", self._get_meta(conn, "version", 0) + 1)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        await self._run("update", bump)
+
+    async def get_seed_version(self):
+        return await self._run("find", self._get_meta, "seed_version", 0)
+
+    async def set_seed_version(self, version):
+        await self._run("update", self._set_meta, "seed_version", version)
+
+    async def acquire_seed_lock(self, owner, ttl_seconds):
+        # Workers may share the file, so take the lock inside a write transaction
+        def acquire(conn):
+            now = time.time()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                lock = self._get_meta(conn, "seed_lock", None)
+                if lock and lock["expires_at"] > now:
+                    conn.execute("ROLLBACK")
+                    return False
+                self._set_meta(conn, "seed_lock", {"owner": owner, "expires_at": now + ttl_seconds})
+                conn.execute("COMMIT")
+                return True
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return await self._run("update", acquire)
+
+    async def release_seed_lock(self, owner):
+        def release(conn):
+            lock = self._get_meta(conn, "seed_lock", None)
+            if lock and lock["owner"] == owner:
+                conn.execute("DELETE FROM meta WHERE key = 'seed_lock'")
+        await self._run("delete", release)
+
+    async def upsert_catalog(self, venues, cuisines, services):
+        def upsert(conn):
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for name, items in zip(CATALOG_COLLECTIONS, (venues, cuisines, services)):
+                    for item in items:
+                        self._merge(
+                            conn,
+                            "SELECT doc FROM catalog WHERE collection = ? AND id = ?",
+                            "INSERT OR REPLACE INTO catalog (collection, id, doc) VALUES (?, ?, ?)",
+                            (name, item["id"]), item)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        await self._run("update", upsert)
+
+    async def _collection(self, name):
+        rows = await self._run(
+            "find", lambda conn: conn.execute("SELECT doc FROM catalog WHERE collection = ? ORDER BY rowid", (name,)).fetchall())
+        return [orjson.loads(row[0]) for row in rows]
+
+    async def load_catalog(self):
+        catalog = []
+        for name in CATALOG_COLLECTIONS:
+            items = await self._collection(name)
+            catalog.append([{k: v for k, v in item.items() if k != "max_capacity"} for item in items])
+        return tuple(catalog)
+
+    async def iter_catalog(self, name, catalog_filter):
+        for item in apply_catalog_filter(await self._collection(name), catalog_filter):
+            yield item
+
+    async def find_prices(self, venue_id, cuisine_ids, service_ids):
+        def fetch(conn, name, ids):
+            ids = list(set(ids or ()))
+            if not ids:
+                return []
+            rows = conn.execute(
+                f"SELECT doc FROM catalog WHERE collection = ? AND id IN ({', '.join('?' * len(ids))})",
+                (name, *ids)).fetchall()
+            return [orjson.loads(row[0]) for row in rows]
+        return (
+            await self._run("find", fetch, "venues", [venue_id] if venue_id else None),
+            await self._run("find", fetch, "cuisine_options", cuisine_ids),
+            await self._run("find", fetch, "service_categories", service_ids),
+        )
+
+    @classmethod
+    def _save_plan(cls, conn, plan):
+        row = conn.execute("SELECT doc FROM wedding_plans WHERE plan_id = ?", (plan["plan_id"],)).fetchone()
+        merged = {**orjson.loads(row[0]), **plan} if row else plan
+        conn.execute("INSERT OR REPLACE INTO wedding_plans (plan_id, updated_at, doc) VALUES (?, ?, ?)",
+                     (plan["plan_id"], merged.get("updated_at"), orjson.dumps(merged).decode("utf-8")))
+
+    async def save_plan(self, plan_id, plan_data):
+        await self._run("update", self._save_plan, {**plan_data, "plan_id": plan_id})
+
+    async def get_plan(self, plan_id):
+        row = await self._run(
+            "find", lambda conn: conn.execute("SELECT doc FROM wedding_plans WHERE plan_id = ?", (plan_id,)).fetchone())
+        return orjson.loads(row[0]) if row else None
+
+    async def bulk_save_plans(self, plans):
+        def save_all(conn):
+            errors = []
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for position, plan in enumerate(plans):
+                    try:
+                        self._save_plan(conn, plan)
+                    except (TypeError, sqlite3.Error) as e:
+                        errors.append((position, str(e)))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return errors
+        return await self._run("update", save_all)
+
+    async def iter_plans(self, batch_size):
+        last_rowid = 0
+        while True:
+            rows = await self._run("find", lambda conn: conn.execute(
+                "SELECT rowid, doc FROM wedding_plans WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                (last_rowid, batch_size)).fetchall())
+            if not rows:
+                return
+            for rowid, doc in rows:
+                yield orjson.loads(doc)
+            last_rowid = rows[-1][0]
+
+    async def list_plans(self, plan_filter):
+        clauses = []
+        params = []
+        for field, low, high in plan_filter.ranges():
+            if low is not None:
+                clauses.append(f"json_extract(doc, '$.{field}') >= ?")
+                params.append(low)
+            if high is not None:
+                clauses.append(f"json_extract(doc, '$.{field}') <= ?")
+                params.append(high)
+        if plan_filter.after is not None:
+            updated_at, plan_id = plan_filter.after
+            clauses.append("(updated_at < ? OR (updated_at = ? AND plan_id < ?))")
+            params += [updated_at, updated_at, plan_id]
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = await self._run("find", lambda conn: conn.execute(
+            f"SELECT doc FROM wedding_plans INDEXED BY wedding_plans_listing {where} "
+            "ORDER BY updated_at DESC, plan_id DESC LIMIT ?", (*params, plan_filter.limit)).fetchall())
+        return [
+            {field: plan[field] for field in PLAN_SUMMARY_FIELDS if field in plan}
+            for plan in (orjson.loads(row[0]) for row in rows)
+        ]
+
+def create_repository():
+    if STORAGE_BACKEND == "mongo":
+        return MongoRepository(MONGO_URL, event_listeners=[MongoCommandListener()], **MONGO_POOL_OPTIONS)
+    if STORAGE_BACKEND == "sqlite":
+        return SQLiteRepository(SQLITE_PATH)
+    if STORAGE_BACKEND == "memory":
+        return MemoryRepository()
+    raise ValueError(f"Unknown STORAGE_BACKEND {STORAGE_BACKEND!r}; expected mongo, sqlite or memory")
+
+repository = create_repository()
+
+# How often each process re-reads the catalog version stamp from Mongo
+CATALOG_VERSION_CHECK_SECONDS = float(os.environ.get('CATALOG_VERSION_CHECK_SECONDS', '5'))
+# Catalog reads slower than these count as failures for the circuit breaker
+CATALOG_READ_TIMEOUT_SECONDS = float(os.environ.get('CATALOG_READ_TIMEOUT_SECONDS', '1'))
+CATALOG_LOAD_TIMEOUT_SECONDS = float(os.environ.get('CATALOG_LOAD_TIMEOUT_SECONDS', '5'))
+# How long a request waits for an expired snapshot to revalidate before it is
+# answered from the old one; 0 is pure stale-while-revalidate
+CATALOG_REVALIDATE_WAIT_SECONDS = float(os.environ.get('CATALOG_REVALIDATE_WAIT_SECONDS', '0.05'))
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get('BREAKER_FAILURE_THRESHOLD', '3'))
+BREAKER_RESET_SECONDS = float(os.environ.get('BREAKER_RESET_SECONDS', '10'))
+# Multi-worker hosts: one worker loads the catalog from the store and
+# publishes it to this file (ideally on tmpfs, e.g. /dev/shm); the others
+# map it instead of querying the store
+CATALOG_SHARED_PATH = os.environ.get('CATALOG_SHARED_PATH')
+# The loader rewrites a heartbeat beside that file on every version check;
+# older than this, followers assume it is hung and check the store themselves
+CATALOG_SHARED_MAX_AGE_SECONDS = float(os.environ.get('CATALOG_SHARED_MAX_AGE_SECONDS', '30'))
+# Last loaded catalog, kept on disk so a restart can serve before the store
+# answers (empty disables it). CATALOG_OFFLINE=1 serves only that snapshot,
+# or the built-in seed catalog without one, and never contacts the store for
+# the catalog; pair it with STORAGE_BACKEND=sqlite to keep plans local too.
+CATALOG_SNAPSHOT_PATH = os.environ.get('CATALOG_SNAPSHOT_PATH', 'catalog_snapshot.bin')
+CATALOG_OFFLINE = os.environ.get('CATALOG_OFFLINE', '') not in ('', '0', 'false')
+MAX_BATCH_SCENARIOS = int(os.environ.get('MAX_BATCH_SCENARIOS', '5000'))
+# Keeps vectorized totals inside int64 for any realistic catalog
+MAX_GUEST_COUNT = 1_000_000
+# Resolution of the optimizer's budget axis; larger is more precise but slower
+OPTIMIZER_BUDGET_STEPS = int(os.environ.get('OPTIMIZER_BUDGET_STEPS', '5000'))
+# Cap on options x results x steps per run; large catalogs or top_n trade
+# budget resolution (down to OPTIMIZER_MIN_STEPS) for bounded latency
+OPTIMIZER_MAX_WORK = int(os.environ.get('OPTIMIZER_MAX_WORK', '3000000'))
+OPTIMIZER_MIN_STEPS = 200
+MAX_OPTIMIZER_RESULTS = 20
+MAX_CATALOG_PAGE_SIZE = 500
+DEFAULT_PLAN_PAGE_SIZE = 50
+MAX_PLAN_PAGE_SIZE = 500
+PLAN_IMPORT_BATCH_SIZE = int(os.environ.get('PLAN_IMPORT_BATCH_SIZE', '1000'))
+PLAN_EXPORT_BATCH_SIZE = int(os.environ.get('PLAN_EXPORT_BATCH_SIZE', '1000'))
+MAX_IMPORT_LINE_BYTES = int(os.environ.get('MAX_IMPORT_LINE_BYTES', str(1024 * 1024)))
+MAX_REPORTED_ERRORS = 100
+MAX_CURVE_POINTS = int(os.environ.get('MAX_CURVE_POINTS', '2000'))
 
 # Models
 class VenueOption(BaseModel):
@@ -74,281 +1213,1393 @@ class WeddingPlan(BaseModel):
     updated_at: Optional[str] = None
 
 class BudgetCalculation(BaseModel):
-    guest_count: int
+    guest_count: int = Field(ge=0, le=MAX_GUEST_COUNT)
+    venue_id: Optional[str] = None
+    cuisine_ids: Optional[List[str]] = None
+    service_ids: Optional[List[str]] = None
+
+class BatchBudgetCalculation(BaseModel):
+    scenarios: List[BudgetCalculation]
+    include_breakdown: bool = False
+
+class OptimizePlanRequest(BaseModel):
+    guest_count: int = Field(ge=0, le=MAX_GUEST_COUNT)
+    total_budget: int = Field(ge=0)
+    required_categories: List[str] = ["Venue", "Catering"]
+    exclude_categories: List[str] = []
+    min_venue_capacity: Optional[int] = None
+    priorities: Dict[str, confloat(ge=0, allow_inf_nan=False)] = {}
+    top_n: int = Field(default=5, ge=1, le=MAX_OPTIMIZER_RESULTS)
+
+class CostCurveRequest(BaseModel):
     venue_id: Optional[str] = None
     cuisine_ids: Optional[List[str]] = None
     service_ids: Optional[List[str]] = None
+    min_guests: int = Field(default=100, ge=0, le=MAX_GUEST_COUNT)
+    max_guests: int = Field(default=1000, ge=0, le=MAX_GUEST_COUNT)
+    step: int = Field(default=50, gt=0)
+
+# Catalog seed data. Bump SEED_VERSION whenever it changes so the next
+# deploy upserts it; unchanged deploys only pay a version check.
+SEED_VERSION = 2
+SEED_LOCK_SECONDS = int(os.environ.get('SEED_LOCK_SECONDS', '60'))
+
+# Venue options
+SEED_VENUES = [
+    {
+        "id": "v1",
+        "name": "Garden Paradise",
+        "description": "Beautiful outdoor garden venue with natural ambiance",
+        "price_range": "Budget-Friendly",
+        "capacity": "200-300 guests",
+        "price": 150000,
+        "image": "https://images.unsplash.com/photo-1519167758481-83f29da8c8d6?w=800",
+        "amenities": ["Open Garden", "Parking", "Basic Lighting", "Mandap Setup"]
+    },
+    {
+        "id": "v2",
+        "name": "Royal Banquet Hall",
+        "description": "Elegant indoor banquet hall with AC and modern facilities",
+        "price_range": "Mid-Range",
+        "capacity": "300-500 guests",
+        "price": 300000,
+        "image": "https://images.unsplash.com/photo-1464366400600-7168b8af9bc3?w=800",
+        "amenities": ["AC Hall", "Valet Parking", "Premium Lighting", "Stage Setup", "Green Rooms"]
+    },
+    {
+        "id": "v3",
+        "name": "Heritage Palace",
+        "description": "Luxurious heritage property with traditional architecture",
+        "price_range": "Premium",
+        "capacity": "500+ guests",
+        "price": 500000,
+        "image": "https://images.unsplash.com/photo-1478146896981-b80fe463b330?w=800",
+        "amenities": ["Multiple Halls", "Premium Decor", "Valet Service", "Bridal Suite", "Photography Areas"]
+    },
+    {
+        "id": "v4",
+        "name": "Lakeside Resort",
+        "description": "Scenic lakeside venue perfect for destination weddings",
+        "price_range": "Mid-Range",
+        "capacity": "150-250 guests",
+        "price": 250000,
+        "image": "https://images.unsplash.com/photo-1511285560929-80b456fea0bc?w=800",
+        "amenities": ["Lake View", "Accommodation", "Outdoor Setup", "Bonfire Area"]
+    }
+]
+
+# Cuisine options
+SEED_CUISINES = [
+    {
+        "id": "c1",
+        "name": "Traditional North Indian",
+        "description": "Classic North Indian vegetarian menu",
+        "price_per_plate": 400,
+        "cuisine_type": "Vegetarian",
+        "popular_dishes": ["Dal Makhani", "Paneer Butter Masala", "Naan", "Biryani", "Gulab Jamun"]
+    },
+    {
+        "id": "c2",
+        "name": "South Indian Delights",
+        "description": "Authentic South Indian vegetarian spread",
+        "price_per_plate": 350,
+        "cuisine_type": "Vegetarian",
+        "popular_dishes": ["Dosa", "Idli", "Sambar", "Rasam", "Payasam"]
+    },
+    {
+        "id": "c3",
+        "name": "Mixed Cuisine Buffet",
+        "description": "Multi-cuisine buffet with veg and non-veg options",
+        "price_per_plate": 600,
+        "cuisine_type": "Mixed",
+        "popular_dishes": ["Tandoori Chicken", "Mutton Curry", "Paneer Tikka", "Pasta", "Chinese"]
+    },
+    {
+        "id": "c4",
+        "name": "Premium Royal Feast",
+        "description": "Elaborate royal menu with premium ingredients",
+        "price_per_plate": 800,
+        "cuisine_type": "Premium",
+        "popular_dishes": ["Raan", "Kebabs", "Live Counters", "Continental", "Exotic Desserts"]
+    },
+    {
+        "id": "c5",
+        "name": "Simple Vegetarian",
+        "description": "Budget-friendly simple veg menu",
+        "price_per_plate": 250,
+        "cuisine_type": "Vegetarian",
+        "popular_dishes": ["Dal", "Sabzi", "Roti", "Rice", "Sweet"]
+    }
+]
+
+# Service categories
+SEED_SERVICES = [
+    {
+        "id": "s1",
+        "category": "Photography",
+        "name": "Basic Photography Package",
+        "description": "One photographer for 6 hours",
+        "price": 30000,
+        "package_type": "Basic"
+    },
+    {
+        "id": "s2",
+        "category": "Photography",
+        "name": "Premium Photo + Video",
+        "description": "Photography + Videography + Drone shots",
+        "price": 80000,
+        "package_type": "Premium"
+    },
+    {
+        "id": "s3",
+        "category": "Decorations",
+        "name": "Simple Floral Decor",
+        "description": "Basic floral decoration for venue",
+        "price": 40000,
+        "package_type": "Basic"
+    },
+    {
+        "id": "s4",
+        "category": "Decorations",
+        "name": "Grand Theme Decor",
+        "description": "Themed decoration with lights and props",
+        "price": 100000,
+        "package_type": "Premium"
+    },
+    {
+        "id": "s5",
+        "category": "Entertainment",
+        "name": "DJ + Sound System",
+        "description": "Professional DJ with sound system",
+        "price": 25000,
+        "package_type": "Standard"
+    },
+    {
+        "id": "s6",
+        "category": "Entertainment",
+        "name": "Live Band Performance",
+        "description": "Live music band for 3 hours",
+        "price": 50000,
+        "package_type": "Premium"
+    },
+    {
+        "id": "s7",
+        "category": "Makeup",
+        "name": "Bridal Makeup Package",
+        "description": "Professional bridal makeup + trial",
+        "price": 20000,
+        "package_type": "Standard"
+    },
+    {
+        "id": "s8",
+        "category": "Makeup",
+        "name": "Bridal + Family Makeup",
+        "description": "Bridal makeup + 5 family members",
+        "price": 40000,
+        "package_type": "Premium"
+    },
+    {
+        "id": "s9",
+        "category": "Invitations",
+        "name": "Printed Wedding Cards",
+        "description": "Designer printed cards (500 pcs)",
+        "price": 15000,
+        "package_type": "Standard"
+    },
+    {
+        "id": "s10",
+        "category": "Invitations",
+        "name": "Premium Digital + Print",
+        "description": "Digital invites + premium printed cards",
+        "price": 30000,
+        "package_type": "Premium"
+    },
+    {
+        "id": "s11",
+        "category": "Transportation",
+        "name": "Wedding Car Rental",
+        "description": "Luxury car for bride/groom",
+        "price": 15000,
+        "package_type": "Standard"
+    },
+    {
+        "id": "s12",
+        "category": "Mehendi",
+        "name": "Mehendi Artist",
+        "description": "Professional mehendi for bride + family",
+        "price": 10000,
+        "package_type": "Standard"
+    }
+]
 
 # Initialize database with sample data
-def initialize_database():
-    # Clear existing data
-    venues_collection.delete_many({})
-    cuisine_options_collection.delete_many({})
-    service_categories_collection.delete_many({})
-    
-    # Insert venue options
-    venues = [
-        {
-            "id": "v1",
-            "name": "Garden Paradise",
-            "description": "Beautiful outdoor garden venue with natural ambiance",
-            "price_range": "Budget-Friendly",
-            "capacity": "200-300 guests",
-            "price": 150000,
-            "image": "https://images.unsplash.com/photo-1519167758481-83f29da8c8d6?w=800",
-            "amenities": ["Open Garden", "Parking", "Basic Lighting", "Mandap Setup"]
-        },
-        {
-            "id": "v2",
-            "name": "Royal Banquet Hall",
-            "description": "Elegant indoor banquet hall with AC and modern facilities",
-            "price_range": "Mid-Range",
-            "capacity": "300-500 guests",
-            "price": 300000,
-            "image": "https://images.unsplash.com/photo-1464366400600-7168b8af9bc3?w=800",
-            "amenities": ["AC Hall", "Valet Parking", "Premium Lighting", "Stage Setup", "Green Rooms"]
-        },
-        {
-            "id": "v3",
-            "name": "Heritage Palace",
-            "description": "Luxurious heritage property with traditional architecture",
-            "price_range": "Premium",
-            "capacity": "500+ guests",
-            "price": 500000,
-            "image": "https://images.unsplash.com/photo-1478146896981-b80fe463b330?w=800",
-            "amenities": ["Multiple Halls", "Premium Decor", "Valet Service", "Bridal Suite", "Photography Areas"]
-        },
-        {
-            "id": "v4",
-            "name": "Lakeside Resort",
-            "description": "Scenic lakeside venue perfect for destination weddings",
-            "price_range": "Mid-Range",
-            "capacity": "150-250 guests",
-            "price": 250000,
-            "image": "https://images.unsplash.com/photo-1511285560929-80b456fea0bc?w=800",
-            "amenities": ["Lake View", "Accommodation", "Outdoor Setup", "Bonfire Area"]
-        }
-    ]
-    venues_collection.insert_many(venues)
+async def initialize_database():
+    if await repository.get_seed_version() >= SEED_VERSION:
+        return
     
-    # Insert cuisine options
-    cuisines = [
-        {
-            "id": "c1",
-            "name": "Traditional North Indian",
-            "description": "Classic North Indian vegetarian menu",
-            "price_per_plate": 400,
-            "cuisine_type": "Vegetarian",
-            "popular_dishes": ["Dal Makhani", "Paneer Butter Masala", "Naan", "Biryani", "Gulab Jamun"]
-        },
-        {
-            "id": "c2",
-            "name": "South Indian Delights",
-            "description": "Authentic South Indian vegetarian spread",
-            "price_per_plate": 350,
-            "cuisine_type": "Vegetarian",
-            "popular_dishes": ["Dosa", "Idli", "Sambar", "Rasam", "Payasam"]
-        },
-        {
-            "id": "c3",
-            "name": "Mixed Cuisine Buffet",
-            "description": "Multi-cuisine buffet with veg and non-veg options",
-            "price_per_plate": 600,
-            "cuisine_type": "Mixed",
-            "popular_dishes": ["Tandoori Chicken", "Mutton Curry", "Paneer Tikka", "Pasta", "Chinese"]
-        },
-        {
-            "id": "c4",
-            "name": "Premium Royal Feast",
-            "description": "Elaborate royal menu with premium ingredients",
-            "price_per_plate": 800,
-            "cuisine_type": "Premium",
-            "popular_dishes": ["Raan", "Kebabs", "Live Counters", "Continental", "Exotic Desserts"]
-        },
-        {
-            "id": "c5",
-            "name": "Simple Vegetarian",
-            "description": "Budget-friendly simple veg menu",
-            "price_per_plate": 250,
-            "cuisine_type": "Vegetarian",
-            "popular_dishes": ["Dal", "Sabzi", "Roti", "Rice", "Sweet"]
+    # Only one worker applies the seed; the rest keep serving the current catalog
+    # and pick up the new one on their next catalog version check
+    owner = str(uuid.uuid4())
+    if not await repository.acquire_seed_lock(owner, SEED_LOCK_SECONDS):
+        logger.info("Catalog seed v%s is being applied by another worker", SEED_VERSION)
+        return
+    try:
+        if await repository.get_seed_version() >= SEED_VERSION:
+            return
+        venues = [with_capacity_bounds(venue) for venue in SEED_VENUES]
+        await repository.upsert_catalog(venues, SEED_CUISINES, SEED_SERVICES)
+        await repository.set_seed_version(SEED_VERSION)
+        await bump_catalog_version()
+        logger.info("Applied catalog seed v%s", SEED_VERSION)
+    finally:
+        await repository.release_seed_lock(owner)
+
+# Request coalescing: concurrent callers asking for the same key share one
+# in-flight call. Results are shared too, so callers must not mutate them.
+class SingleFlight:
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key, fn):
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+            try:
+                # Shielded so one follower going away does not cancel the others
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The leader was cancelled, not us: run the call ourselves
+                return await self.do(key, fn)
+
+        # The leader runs the call inline, so the common uncontended case
+        # costs no extra task or event loop hop
+        self.calls += 1
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # followers re-raise it; nothing left to log
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+single_flights = {}
+
+def single_flight(name):
+    flight = single_flights.get(name)
+    if flight is None:
+        flight = single_flights[name] = SingleFlight(name)
+    return flight
+
+@metrics.register
+def render_single_flight_metrics():
+    lines = []
+    for metric, attr in (("singleflight_calls_total", "calls"), ("singleflight_coalesced_total", "coalesced")):
+        lines.append(f"# TYPE {metric} counter")
+        for name, flight in sorted(single_flights.items()):
+            lines.append(f'{metric}{{group="{name}"}} {getattr(flight, attr)}')
+    return lines
+
+catalog_flight = single_flight("catalog")
+catalog_listing_flight = single_flight("catalog_listing")
+plan_flight = single_flight("wedding_plan")
+
+# Catalog cache
+async def bump_catalog_version():
+    # Call after every catalog edit so all processes reload on their next version check
+    await repository.bump_catalog_version()
+    catalog_cache.invalidate()
+
+def encode_json(payload):
+    return orjson.dumps(payload)
+
+# Compact id-keyed price table used by budget calculations
+class PriceEntry:
+    __slots__ = ("id", "name", "category", "price")
+
+    def __init__(self, item_id, name, category, price):
+        self.id = item_id
+        self.name = name
+        self.category = category
+        self.price = price
+
+class PriceIndex:
+    __slots__ = ("venues", "cuisines", "services")
+
+    def __init__(self, venues, cuisines, services):
+        self.venues = {v["id"]: PriceEntry(v["id"], v["name"], "Venue", v["price"]) for v in venues}
+        self.cuisines = {c["id"]: PriceEntry(c["id"], c["name"], "Catering", c["price_per_plate"]) for c in cuisines}
+        self.services = {s["id"]: PriceEntry(s["id"], s["name"], s["category"], s["price"]) for s in services}
+
+INT64_SAFE_BOUND = float(2 ** 62)
+
+class PriceVectors:
+    # Array-backed view of a PriceIndex for pricing many selections at once.
+    # The last slot of each price array is zero and stands in for unknown ids.
+    __slots__ = ("venue_pos", "venue_prices", "cuisine_pos", "cuisine_prices", "service_pos", "service_prices")
+
+    def __init__(self, index, arrays=None):
+        # `arrays` are ready-made price arrays, e.g. views into a snapshot file
+        venue_prices, cuisine_prices, service_prices = arrays or (None, None, None)
+        self.venue_pos, self.venue_prices = self._pack(index.venues, venue_prices)
+        self.cuisine_pos, self.cuisine_prices = self._pack(index.cuisines, cuisine_prices)
+        self.service_pos, self.service_prices = self._pack(index.services, service_prices)
+
+    @staticmethod
+    def _pack(entries, prices=None):
+        positions = {item_id: i for i, item_id in enumerate(entries)}
+        if prices is None:
+            prices = np.zeros(len(entries) + 1, dtype=np.int64)
+            prices[:-1] = [entry.price for entry in entries.values()]
+        elif len(prices) != len(entries) + 1:
+            raise ValueError("Price array does not match the catalog")
+        return positions, prices
+
+    @staticmethod
+    def _sum_per_scenario(id_lists, positions, prices):
+        # Duplicated ids are counted once per occurrence, like price_budget
+        scenario_idx = []
+        item_idx = []
+        for i, ids in enumerate(id_lists):
+            for item_id in ids or ():
+                pos = positions.get(item_id)
+                if pos is not None:
+                    scenario_idx.append(i)
+                    item_idx.append(pos)
+        sums = np.zeros(len(id_lists), dtype=np.int64)
+        np.add.at(sums, np.asarray(scenario_idx, dtype=np.intp), prices[np.asarray(item_idx, dtype=np.intp)])
+        return sums
+
+    def components(self, calculations):
+        # Returns (venue cost, per-plate total, services cost) per scenario
+        missing_venue = len(self.venue_prices) - 1
+        venue_idx = np.fromiter(
+            (self.venue_pos.get(c.venue_id, missing_venue) for c in calculations),
+            dtype=np.intp, count=len(calculations))
+        per_plate = self._sum_per_scenario(
+            [c.cuisine_ids for c in calculations], self.cuisine_pos, self.cuisine_prices)
+        services = self._sum_per_scenario(
+            [c.service_ids for c in calculations], self.service_pos, self.service_prices)
+        return self.venue_prices[venue_idx], per_plate, services
+
+    def totals(self, calculations):
+        venue_cost, per_plate, services_cost = self.components(calculations)
+        guests = np.fromiter((c.guest_count for c in calculations), dtype=np.int64, count=len(calculations))
+        # int64 wraps silently; totals that might not fit are summed as Python ints
+        bound = sum(float(np.abs(part).max(initial=0)) for part in (venue_cost, services_cost)) + \
+            float(np.abs(per_plate).max(initial=0)) * float(guests.max(initial=0))
+        if bound >= INT64_SAFE_BOUND:
+            venue_cost, per_plate, services_cost, guests = (
+                part.astype(object) for part in (venue_cost, per_plate, services_cost, guests))
+        return venue_cost + per_plate * guests + services_cost
+
+async def fetch_price_index(calculation):
+    venues, cuisines, services = await catalog_breaker.call(
+        lambda: repository.find_prices(calculation.venue_id, calculation.cuisine_ids, calculation.service_ids),
+        CATALOG_READ_TIMEOUT_SECONDS)
+    return PriceIndex(venues, cuisines, services)
+
+def parse_capacity(capacity):
+    # "200-300 guests" -> (200, 300), "500+ guests" -> (500, None)
+    numbers = [int(n) for n in re.findall(r"\d+", capacity or "")]
+    if not numbers:
+        return 0, None
+    if "+" in capacity or len(numbers) == 1:
+        return numbers[0], None
+    return numbers[0], numbers[1]
+
+def with_capacity_bounds(venue):
+    # Stored alongside the capacity string so min_capacity filters can use an index
+    return {**venue, "max_capacity": parse_capacity(venue["capacity"])[1]}
+
+class CatalogSnapshot:
+    BODIES = ("venues", "cuisines", "services", "bootstrap")
+
+    def __init__(self, version, venues, cuisines, services, sections=None):
+        self.version = version
+        self.venues = venues
+        self.cuisines = cuisines
+        self.services = services
+
+        grouped = {}
+        for service in services:
+            grouped.setdefault(service["category"], []).append(service)
+        self.services_by_category = grouped
+        self.price_index = PriceIndex(venues, cuisines, services)
+
+        if sections is not None:
+            # Built from a snapshot file: bodies, compressed variants and price
+            # arrays are views into it rather than per-process copies
+            for name in self.BODIES:
+                setattr(self, f"{name}_body", sections[f"{name}_body"])
+            self.etag = bytes(sections["etag"]).decode("ascii")
+            self._compressed = {
+                (name, encoding): sections[f"{name}_body.{encoding}"]
+                for name in self.BODIES for encoding in ("gzip", "br") if f"{name}_body.{encoding}" in sections
+            }
+            self.price_vectors = PriceVectors(self.price_index, tuple(
+                np.frombuffer(sections[f"{kind}_prices"], dtype=np.int64) for kind in ("venue", "cuisine", "service")))
+        else:
+            self.venues_body = encode_json({"venues": venues})
+            self.cuisines_body = encode_json({"cuisines": cuisines})
+            self.services_body = encode_json({"services": grouped, "all_services": services})
+            # Whole catalog in one payload, every item once
+            self.bootstrap_body = encode_json({
+                "catalog_version": version, "venues": venues, "cuisines": cuisines, "services": services})
+            # Strong validator: the version stamp plus a digest of the payload, so
+            # a reseeded store that restarts its version count still gets a new tag
+            self.etag = f"v{version}-{hashlib.blake2b(self.bootstrap_body, digest_size=8).hexdigest()}"
+            self._compressed = {}
+            self.price_vectors = PriceVectors(self.price_index)
+        self.venue_capacity = {v["id"]: parse_capacity(v["capacity"]) for v in venues}
+
+    def body(self, name, encoding=None):
+        # Compressed once per snapshot (so per catalog version) at the
+        # strongest setting, then served as is
+        body = getattr(self, f"{name}_body")
+        if encoding is None or len(body) < COMPRESSION_MIN_BYTES:
+            return body, None
+        key = (name, encoding)
+        compressed = self._compressed.get(key)
+        if compressed is None:
+            compressed = self._compressed[key] = compress_body(body, encoding, 11 if encoding == "br" else 9)
+        return compressed, encoding
+
+    def collection(self, name):
+        # A store collection's items, with the query-only fields apply_catalog_filter uses
+        if name == "venues":
+            return [with_capacity_bounds(venue) for venue in self.venues]
+        return self.cuisines if name == "cuisine_options" else self.services
+
+    def sections(self):
+        # Everything a snapshot file needs to rebuild this snapshot
+        sections = {"catalog": encode_json({"venues": self.venues, "cuisines": self.cuisines, "services": self.services}),
+                    "etag": self.etag.encode("ascii")}
+        for name in self.BODIES:
+            sections[f"{name}_body"] = getattr(self, f"{name}_body")
+            for encoding in ("gzip", "br") if brotli is not None else ("gzip",):
+                body, used = self.body(name, encoding)
+                if used:
+                    sections[f"{name}_body.{encoding}"] = body
+        sections["venue_prices"] = self.price_vectors.venue_prices
+        sections["cuisine_prices"] = self.price_vectors.cuisine_prices
+        sections["service_prices"] = self.price_vectors.service_prices
+        return sections
+
+# Snapshot files: magic, header length, a JSON header with the catalog
+# version and section offsets, then the 8-byte aligned sections
+SNAPSHOT_MAGIC = b"WPSNAP01"
+
+def write_snapshot_file(path, snapshot):
+    sections = snapshot.sections()
+    offsets = {}
+    position = 0
+    for name, data in sections.items():
+        offsets[name] = [position, memoryview(data).nbytes]
+        position += -(-memoryview(data).nbytes // 8) * 8
+    header = encode_json({"version": snapshot.version, "written_at": time.time(), "sections": offsets})
+    # Written beside the target and renamed over it, so readers only ever
+    # map a complete file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(SNAPSHOT_MAGIC + len(header).to_bytes(8, "little") + header)
+        f.write(b"\0" * (-f.tell() % 8))
+        for name, data in sections.items():
+            f.write(memoryview(data).cast("B"))
+            f.write(b"\0" * (-f.tell() % 8))
+    os.replace(tmp_path, path)
+
+def read_snapshot_file(path):
+    with open(path, "rb") as f:
+        view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    if bytes(view[:8]) != SNAPSHOT_MAGIC:
+        raise ValueError(f"{path} is not a catalog snapshot")
+    header_end = 16 + int.from_bytes(view[8:16], "little")
+    header = orjson.loads(view[16:header_end])
+    data_start = -(-header_end // 8) * 8
+    sections = {
+        name: view[data_start + offset:data_start + offset + length]
+        for name, (offset, length) in header["sections"].items()
+    }
+    catalog = orjson.loads(sections["catalog"])
+    return CatalogSnapshot(header["version"], catalog["venues"], catalog["cuisines"], catalog["services"], sections)
+
+class BufferResponse(Response):
+    # Sends any bytes-like body (such as a view into a snapshot file) as is
+    def render(self, content):
+        return content
+
+def catalog_body_response(request, snapshot, name):
+    body, encoding = snapshot.body(name, negotiate_encoding(request.headers.get("accept-encoding")))
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return BufferResponse(content=body, media_type="application/json", headers=headers)
+
+def etag_matches(if_none_match, etag):
+    # Compared weakly as RFC 9110 requires for If-None-Match; the encoding
+    # suffix is ignored so a gzip and a brotli copy validate each other
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        tag = tag.removeprefix("W/").strip('"')
+        if tag == etag or tag.rsplit("-", 1)[0] == etag:
+            return True
+    return False
+
+async def load_catalog_snapshot(version):
+    venues, cuisines, services = await catalog_breaker.call(repository.load_catalog, CATALOG_LOAD_TIMEOUT_SECONDS)
+    return CatalogSnapshot(version, venues, cuisines, services)
+
+# Resilience for catalog reads: a circuit breaker stops sending them to a
+# slow or failing store, and the cache keeps answering from its last good
+# snapshot while it revalidates in the background
+class CatalogUnavailable(RuntimeError):
+    pass
+
+STORE_ERRORS = (asyncio.TimeoutError, PyMongoError, sqlite3.Error, OSError)
+
+class CircuitBreaker:
+    def __init__(self, name, failure_threshold, reset_seconds):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.rejected = 0
+        self.trips = 0
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_seconds:
+            return "open"
+        return "half_open"
+
+    async def call(self, fn, timeout):
+        state = self.state
+        if state == "open" or (state == "half_open" and self.trial_running):
+            self.rejected += 1
+            raise CatalogUnavailable(f"{self.name} circuit is open")
+        # Half-open lets exactly one trial call through
+        trial = state == "half_open"
+        if trial:
+            self.trial_running = True
+        try:
+            result = await asyncio.wait_for(fn(), timeout)
+        except STORE_ERRORS as e:
+            self._record_failure(trial)
+            raise CatalogUnavailable(f"{self.name} read failed: {e!r}") from e
+        finally:
+            if trial:
+                self.trial_running = False
+        self.failures = 0
+        self.opened_at = None
+        return result
+
+    def _record_failure(self, trial):
+        self.failures += 1
+        if trial or (self.opened_at is None and self.failures >= self.failure_threshold):
+            self.trips += 1
+            self.opened_at = time.monotonic()
+            logger.warning("%s circuit opened after %s consecutive failures", self.name, self.failures)
+
+catalog_breaker = CircuitBreaker("catalog", BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS)
+
+class SharedCatalog:
+    def __init__(self, path):
+        if fcntl is None:
+            raise RuntimeError("CATALOG_SHARED_PATH needs POSIX file locks")
+        self.path = path
+        self.heartbeat_path = f"{path}.heartbeat"
+        self._lock_file = None
+        self._file_id = None
+        self._unreadable_id = None
+        self.published = None
+        self.loads = 0
+        self.publishes = 0
+        self.silent_loader_checks = 0
+
+    @property
+    def is_loader(self):
+        return self._lock_file is not None
+
+    def try_become_loader(self):
+        # The lock is held for the life of the process; when the loader exits
+        # the next worker to refresh takes over
+        if self._lock_file is None:
+            lock_file = open(f"{self.path}.lock", "a+b")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.close()
+                return False
+            self._lock_file = lock_file
+            logger.info("Publishing the shared catalog snapshot to %s", self.path)
+        return True
+
+    async def publish(self, snapshot):
+        if snapshot is not self.published:
+            await asyncio.to_thread(write_snapshot_file, self.path, snapshot)
+            self.published = snapshot
+            self.publishes += 1
+
+    def beat(self, stale):
+        # Loader only: the time of this check and whether it reached the store
+        tmp_path = f"{self.heartbeat_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(encode_json({"checked_at": time.time(), "stale": stale}))
+        os.replace(tmp_path, self.heartbeat_path)
+
+    def loader_status(self):
+        # (alive, stale) from the loader's last heartbeat; no heartbeat, or an
+        # old one, means followers should not trust the file to be current
+        try:
+            with open(self.heartbeat_path, "rb") as f:
+                beat = orjson.loads(f.read())
+            alive = time.time() - beat["checked_at"] <= CATALOG_SHARED_MAX_AGE_SECONDS
+            stale = bool(beat["stale"])
+        except (OSError, ValueError, KeyError, TypeError):
+            alive, stale = False, False
+        if not alive:
+            self.silent_loader_checks += 1
+        return alive, stale
+
+    def read(self, current):
+        # Re-maps the file only when the loader has replaced it, and never
+        # goes back to an older version than this worker already has
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        file_id = (stat.st_ino, stat.st_mtime_ns)
+        if current is not None and file_id == self._file_id:
+            return current
+        if file_id == self._unreadable_id:
+            return None
+        try:
+            snapshot = read_snapshot_file(self.path)
+        except (OSError, ValueError, KeyError) as e:
+            # e.g. a file from another release; read the store until the loader replaces it
+            logger.warning("Ignoring unreadable shared catalog %s: %s", self.path, e)
+            self._unreadable_id = file_id
+            return None
+        self._file_id = file_id
+        self.loads += 1
+        if current is not None and snapshot.version < current.version:
+            return current
+        return snapshot
+
+    def render_metrics(self):
+        return [
+            "# TYPE catalog_shared_loader gauge",
+            f"catalog_shared_loader {int(self.is_loader)}",
+            "# TYPE catalog_shared_maps_total counter",
+            f"catalog_shared_maps_total {self.loads}",
+            "# TYPE catalog_shared_publishes_total counter",
+            f"catalog_shared_publishes_total {self.publishes}",
+            "# TYPE catalog_shared_silent_loader_checks_total counter",
+            f"catalog_shared_silent_loader_checks_total {self.silent_loader_checks}",
+        ]
+
+shared_catalog = SharedCatalog(CATALOG_SHARED_PATH) if CATALOG_SHARED_PATH else None
+if shared_catalog is not None:
+    metrics.register(shared_catalog.render_metrics)
+
+def consume_exception(task):
+    # Background revalidations report through the breaker and logs, not here
+    if not task.cancelled():
+        task.exception()
+
+def load_disk_snapshot():
+    if not CATALOG_SNAPSHOT_PATH or not os.path.exists(CATALOG_SNAPSHOT_PATH):
+        return None
+    try:
+        snapshot = read_snapshot_file(CATALOG_SNAPSHOT_PATH)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning("Ignoring unreadable catalog snapshot %s: %s", CATALOG_SNAPSHOT_PATH, e)
+        return None
+    logger.info("Loaded catalog v%s from %s", snapshot.version, CATALOG_SNAPSHOT_PATH)
+    return snapshot
+
+async def persist_snapshot(snapshot):
+    if not CATALOG_SNAPSHOT_PATH or CATALOG_OFFLINE:
+        return
+    try:
+        await asyncio.to_thread(write_snapshot_file, CATALOG_SNAPSHOT_PATH, snapshot)
+    except OSError as e:
+        logger.warning("Could not persist the catalog snapshot to %s: %s", CATALOG_SNAPSHOT_PATH, e)
+
+def seed_snapshot():
+    return CatalogSnapshot(0, copy.deepcopy(SEED_VENUES), copy.deepcopy(SEED_CUISINES), copy.deepcopy(SEED_SERVICES))
+
+class CatalogCache:
+    def __init__(self):
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._pinned = False
+        # Set by invalidate(); bumped so the next refresh does not join one
+        # that started before the edit
+        self._generation = 0
+        self._must_revalidate = False
+        # A primed disk snapshot may come from another store whose version
+        # count happens to match, so the first revalidation reloads in full
+        self._primed = False
+        # Set while following a loader that reports it cannot reach the store
+        self._loader_stale = False
+        self.stale_served = 0
+
+    async def get(self):
+        snapshot = await self._get()
+        if self._loader_stale:
+            mark_request_stale()
+        return snapshot
+
+    async def _get(self):
+        snapshot = self._snapshot
+        if self._pinned:
+            return snapshot
+        if (snapshot is not None and not self._must_revalidate
+                and time.monotonic() - self._checked_at < CATALOG_VERSION_CHECK_SECONDS):
+            return snapshot
+        generation = self._generation
+        refresh = asyncio.ensure_future(catalog_flight.do(("refresh", generation), lambda: self._refresh(generation)))
+        refresh.add_done_callback(consume_exception)
+        # Without a snapshot, or right after a local edit, callers wait for the
+        # reload; otherwise they wait briefly and then get the old snapshot
+        wait = None if snapshot is None or self._must_revalidate else CATALOG_REVALIDATE_WAIT_SECONDS
+        try:
+            return await asyncio.wait_for(asyncio.shield(refresh), wait)
+        except asyncio.TimeoutError:
+            pass
+        except CatalogUnavailable:
+            if snapshot is None:
+                raise
+        self.stale_served += 1
+        mark_request_stale()
+        return snapshot
+
+    async def _refresh(self, generation):
+        snapshot = self._snapshot
+        # Workers that are not the loader follow the shared file, except right
+        # after their own edit, which they must see without waiting for it,
+        # and while still serving a primed disk snapshot
+        if (shared_catalog is not None and not self._must_revalidate and not self._primed
+                and not shared_catalog.try_become_loader()):
+            alive, loader_stale = shared_catalog.loader_status()
+            shared = shared_catalog.read(snapshot) if alive else None
+            if shared is not None:
+                self._snapshot = shared
+                self._checked_at = time.monotonic()
+                self._loader_stale = loader_stale
+                return shared
+        self._loader_stale = False
+        loader = shared_catalog is not None and shared_catalog.is_loader
+        try:
+            version = await catalog_breaker.call(repository.get_catalog_version, CATALOG_READ_TIMEOUT_SECONDS)
+            if snapshot is None or snapshot.version != version or self._primed:
+                snapshot = await load_catalog_snapshot(version)
+                self._snapshot = snapshot
+                self._primed = False
+                await persist_snapshot(snapshot)
+        except CatalogUnavailable:
+            if loader:
+                await asyncio.to_thread(shared_catalog.beat, True)
+            raise
+        if loader:
+            await shared_catalog.publish(snapshot)
+            await asyncio.to_thread(shared_catalog.beat, False)
+        self._checked_at = time.monotonic()
+        if generation == self._generation:
+            self._must_revalidate = False
+        return snapshot
+
+    async def price_index(self):
+        # Only returns an index once a snapshot has been loaded, so callers can
+        # fall back to targeted queries instead of a full catalog load
+        if self._snapshot is None:
+            return None
+        return (await self.get()).price_index
+
+    async def revalidate(self):
+        # Checks the store now, whatever the snapshot's age
+        generation = self._generation
+        return await catalog_flight.do(("refresh", generation), lambda: self._refresh(generation))
+
+    def prime(self, snapshot):
+        # Served (marked stale) until the first successful revalidation
+        self._snapshot = snapshot
+        self._checked_at = 0.0
+        self._primed = True
+
+    def pin(self, snapshot):
+        # Offline: this snapshot is the catalog, no store checks at all
+        self._snapshot = snapshot
+        self._pinned = True
+
+    def invalidate(self):
+        # The old snapshot stays as a fallback in case the reload fails
+        self._generation += 1
+        self._must_revalidate = True
+
+    def render_metrics(self):
+        return [
+            "# TYPE catalog_stale_responses_total counter",
+            f"catalog_stale_responses_total {self.stale_served}",
+            "# TYPE catalog_circuit_state gauge",
+            *(f'catalog_circuit_state{{state="{state}"}} {int(catalog_breaker.state == state)}'
+              for state in ("closed", "open", "half_open")),
+            "# TYPE catalog_circuit_trips_total counter",
+            f"catalog_circuit_trips_total {catalog_breaker.trips}",
+            "# TYPE catalog_circuit_rejected_total counter",
+            f"catalog_circuit_rejected_total {catalog_breaker.rejected}",
+        ]
+
+catalog_cache = CatalogCache()
+metrics.register(catalog_cache.render_metrics)
+
+@app.exception_handler(CatalogUnavailable)
+async def catalog_unavailable_handler(request, exc):
+    return ORJSONResponse({"detail": "Catalog temporarily unavailable"}, status_code=503,
+                          headers={"Retry-After": str(math.ceil(BREAKER_RESET_SECONDS))})
+
+# Budget optimizer
+TIER_SCORES = {"Basic": 1, "Budget-Friendly": 1, "Standard": 2, "Mid-Range": 2, "Premium": 3}
+
+class OptionGroup:
+    def __init__(self, category, required):
+        self.category = category
+        self.required = required
+        self.options = []  # (item id, cost, value)
+
+def build_option_groups(snapshot, request):
+    def value(category, tier):
+        return request.priorities.get(category, 1.0) * (1 + TIER_SCORES.get(tier, 2))
+
+    required = set(request.required_categories)
+    excluded = set(request.exclude_categories)
+    groups = {}
+
+    def group(category):
+        if category not in groups:
+            groups[category] = OptionGroup(category, category in required)
+        return groups[category]
+
+    if "Venue" not in excluded:
+        venues = group("Venue")
+        for venue in snapshot.venues:
+            low, high = snapshot.venue_capacity[venue["id"]]
+            if request.min_venue_capacity and high is not None and high < request.min_venue_capacity:
+                continue
+            venues.options.append((venue["id"], venue["price"], value("Venue", venue["price_range"])))
+    if "Catering" not in excluded:
+        catering = group("Catering")
+        for cuisine in snapshot.cuisines:
+            catering.options.append((
+                cuisine["id"],
+                cuisine["price_per_plate"] * request.guest_count,
+                value("Catering", cuisine["cuisine_type"]),
+            ))
+    for service in snapshot.services:
+        if service["category"] not in excluded:
+            group(service["category"]).options.append(
+                (service["id"], service["price"], value(service["category"], service["package_type"])))
+    for category in required - groups.keys():
+        groups[category] = OptionGroup(category, True)
+    return list(groups.values())
+
+def prune_options(options, keep):
+    # Within a group only the `keep` cheapest options of each value can reach the top results
+    kept = {}
+    for option in sorted(options, key=lambda o: o[1]):
+        bucket = kept.setdefault(option[2], [])
+        if len(bucket) < keep:
+            bucket.append(option)
+    return [option for bucket in kept.values() for option in bucket]
+
+def optimize_plans(snapshot, request):
+    # Multiple-choice knapsack: pick at most one option per category (exactly
+    # one for required categories) maximising total value within the budget.
+    # dp[b] holds the top-N values among selections costing at most b budget units.
+    top_n = request.top_n
+    groups = build_option_groups(snapshot, request)
+    for group in groups:
+        group.options = prune_options(group.options, top_n)
+
+    # Use exact units when prices share a large common divisor, otherwise
+    # round costs up so every returned plan is guaranteed to fit the budget
+    columns_per_step = sum(len(g.options) + 1 for g in groups) * top_n
+    max_steps = max(OPTIMIZER_MIN_STEPS, min(OPTIMIZER_BUDGET_STEPS, OPTIMIZER_MAX_WORK // max(columns_per_step, 1)))
+    unit = math.gcd(request.total_budget, *(cost for g in groups for _, cost, _ in g.options)) or 1
+    if request.total_budget // unit > max_steps:
+        unit = -(-request.total_budget // max_steps)
+    steps = request.total_budget // unit
+
+    values = np.full((steps + 1, top_n), -np.inf)
+    values[:, 0] = 0.0
+    history = []
+    for group in groups:
+        scaled = [-(-cost // unit) for _, cost, _ in group.options]
+        columns = [values] if not group.required else []
+        choices = [-1] if not group.required else []
+        for i, ((_, _, option_value), cost) in enumerate(zip(group.options, scaled)):
+            if cost > steps:
+                continue
+            shifted = np.full_like(values, -np.inf)
+            shifted[cost:] = values[:steps + 1 - cost] + option_value
+            columns.append(shifted)
+            choices.append(i)
+        if not columns:
+            return []
+        stacked = np.concatenate(columns, axis=1)
+        order = np.argsort(-stacked, axis=1, kind="stable")[:, :top_n]
+        values = np.take_along_axis(stacked, order, axis=1)
+        if values.shape[1] < top_n:
+            values = np.pad(values, ((0, 0), (0, top_n - values.shape[1])), constant_values=-np.inf)
+            order = np.pad(order, ((0, 0), (0, top_n - order.shape[1])))
+        history.append((group, scaled, np.asarray(choices)[order // top_n], order % top_n))
+
+    plans = []
+    for rank in range(top_n):
+        if values[steps, rank] == -np.inf:
+            break
+        picked = []
+        b, r = steps, rank
+        for group, scaled, choice, prev_rank in reversed(history):
+            option = choice[b, r]
+            r = prev_rank[b, r]
+            if option >= 0:
+                picked.append((group.category, group.options[option][0]))
+                b -= scaled[option]
+        plans.append((float(values[steps, rank]), dict(reversed(picked))))
+    return plans
+
+# Package tiers: a "typical" plan per tier and guest bracket, materialized
+# from the catalog's price_range / package_type labels and served from memory
+PACKAGE_TIERS = {"budget": 1, "mid-range": 2, "premium": 3}
+GUEST_BRACKETS = ((0, 200), (200, 300), (300, 400), (400, 500), (500, 750), (750, 1000))
+
+def cuisine_tier_levels(cuisines):
+    # Cuisines carry no tier label besides "Premium", so the rest are ranked
+    # by price per plate into thirds
+    ranked = sorted(cuisines, key=lambda c: (c["price_per_plate"], c["id"]))
+    levels = {}
+    for rank, cuisine in enumerate(ranked):
+        levels[cuisine["id"]] = TIER_SCORES.get(cuisine["cuisine_type"]) if cuisine["cuisine_type"] == "Premium" \
+            else 1 + 3 * rank // len(ranked)
+    return levels
+
+def pick_for_tier(items, level_of, price_of, tier_level):
+    # Closest label to the tier wins, ties going to the richer label except for
+    # budget; within a label budget takes the cheapest, premium the dearest and
+    # mid-range the upper median
+    if not items:
+        return None
+    distance = min(abs(level_of(item) - tier_level) for item in items)
+    levels = {level_of(item) for item in items if abs(level_of(item) - tier_level) == distance}
+    level = min(levels) if tier_level == 1 else max(levels)
+    candidates = sorted((item for item in items if level_of(item) == level), key=lambda item: (price_of(item), item["id"]))
+    if tier_level == 1:
+        return candidates[0]
+    if tier_level == 3:
+        return candidates[-1]
+    return candidates[len(candidates) // 2]
+
+def catalog_changes(old_items, new_items):
+    old = {item["id"]: item for item in old_items}
+    new = {item["id"]: item for item in new_items}
+    return {item_id for item_id in old.keys() | new.keys() if old.get(item_id) != new.get(item_id)}
+
+class TierTable:
+    def __init__(self):
+        self._snapshot = None
+        self.venue_picks = {}     # (tier, bracket) -> venue
+        self.cuisine_picks = {}   # tier -> cuisine
+        self.service_picks = {}   # (tier, category) -> service
+        self.entries = {}         # (tier, bracket) -> materialized plan
+        self.rebuilds = defaultdict(int)
+
+    def sync(self, snapshot):
+        previous = self._snapshot
+        if previous is snapshot:
+            return
+        self._snapshot = snapshot
+        if previous is None:
+            venues_changed = cuisines_changed = True
+            categories = {service["category"] for service in snapshot.services}
+        else:
+            venues_changed = bool(catalog_changes(previous.venues, snapshot.venues))
+            cuisines_changed = bool(catalog_changes(previous.cuisines, snapshot.cuisines))
+            changed = catalog_changes(previous.services, snapshot.services)
+            categories = {s["category"] for s in previous.services + snapshot.services if s["id"] in changed}
+        if not (venues_changed or cuisines_changed or categories):
+            return
+
+        # Only the components whose inputs changed are picked again
+        if venues_changed:
+            for tier, level in PACKAGE_TIERS.items():
+                for bracket in GUEST_BRACKETS:
+                    self.venue_picks[(tier, bracket)] = self._pick_venue(snapshot, level, bracket)
+            self.rebuilds["venue"] += 1
+        if cuisines_changed:
+            levels = cuisine_tier_levels(snapshot.cuisines)
+            for tier, level in PACKAGE_TIERS.items():
+                self.cuisine_picks[tier] = pick_for_tier(
+                    snapshot.cuisines, lambda c: levels[c["id"]], lambda c: c["price_per_plate"], level)
+            self.rebuilds["catering"] += 1
+        for category in categories:
+            options = snapshot.services_by_category.get(category, [])
+            for tier, level in PACKAGE_TIERS.items():
+                pick = pick_for_tier(
+                    options, lambda s: TIER_SCORES.get(s["package_type"], 2), lambda s: s["price"], level)
+                if pick is None:
+                    self.service_picks.pop((tier, category), None)
+                else:
+                    self.service_picks[(tier, category)] = pick
+            self.rebuilds["service"] += 1
+        for tier in PACKAGE_TIERS:
+            for bracket in GUEST_BRACKETS:
+                self.entries[(tier, bracket)] = self._materialize(snapshot, tier, bracket)
+
+    @staticmethod
+    def _pick_venue(snapshot, level, bracket):
+        # Venues that can host the top of the bracket; the largest one if none can
+        fitting = [v for v in snapshot.venues
+                   if snapshot.venue_capacity[v["id"]][1] is None or snapshot.venue_capacity[v["id"]][1] >= bracket[1]]
+        if not fitting:
+            return max(snapshot.venues, key=lambda v: snapshot.venue_capacity[v["id"]][1] or 0, default=None)
+        return pick_for_tier(fitting, lambda v: TIER_SCORES.get(v["price_range"], 2), lambda v: v["price"], level)
+
+    def _materialize(self, snapshot, tier, bracket):
+        venue = self.venue_picks.get((tier, bracket))
+        cuisine = self.cuisine_picks.get(tier)
+        services = [pick for (pick_tier, _), pick in sorted(self.service_picks.items()) if pick_tier == tier]
+        services_cost = sum(service["price"] for service in services)
+        capacity = snapshot.venue_capacity[venue["id"]][1] if venue else None
+        return {
+            "tier": tier,
+            "guest_bracket": list(bracket),
+            "venue_id": venue["id"] if venue else None,
+            "cuisine_ids": [cuisine["id"]] if cuisine else [],
+            "service_ids": [service["id"] for service in services],
+            "venue_cost": venue["price"] if venue else 0,
+            "per_plate_cost": cuisine["price_per_plate"] if cuisine else 0,
+            "services_cost": services_cost,
+            "fixed_cost": (venue["price"] if venue else 0) + services_cost,
+            "venue_fits_bracket": venue is not None and (capacity is None or capacity >= bracket[1]),
         }
-    ]
-    cuisine_options_collection.insert_many(cuisines)
-    
-    # Insert service categories
-    services = [
-        {
-            "id": "s1",
-            "category": "Photography",
-            "name": "Basic Photography Package",
-            "description": "One photographer for 6 hours",
-            "price": 30000,
-            "package_type": "Basic"
-        },
-        {
-            "id": "s2",
-            "category": "Photography",
-            "name": "Premium Photo + Video",
-            "description": "Photography + Videography + Drone shots",
-            "price": 80000,
-            "package_type": "Premium"
-        },
-        {
-            "id": "s3",
-            "category": "Decorations",
-            "name": "Simple Floral Decor",
-            "description": "Basic floral decoration for venue",
-            "price": 40000,
-            "package_type": "Basic"
-        },
-        {
-            "id": "s4",
-            "category": "Decorations",
-            "name": "Grand Theme Decor",
-            "description": "Themed decoration with lights and props",
-            "price": 100000,
-            "package_type": "Premium"
-        },
-        {
-            "id": "s5",
-            "category": "Entertainment",
-            "name": "DJ + Sound System",
-            "description": "Professional DJ with sound system",
-            "price": 25000,
-            "package_type": "Standard"
-        },
-        {
-            "id": "s6",
-            "category": "Entertainment",
-            "name": "Live Band Performance",
-            "description": "Live music band for 3 hours",
-            "price": 50000,
-            "package_type": "Premium"
-        },
-        {
-            "id": "s7",
-            "category": "Makeup",
-            "name": "Bridal Makeup Package",
-            "description": "Professional bridal makeup + trial",
-            "price": 20000,
-            "package_type": "Standard"
-        },
-        {
-            "id": "s8",
-            "category": "Makeup",
-            "name": "Bridal + Family Makeup",
-            "description": "Bridal makeup + 5 family members",
-            "price": 40000,
-            "package_type": "Premium"
-        },
-        {
-            "id": "s9",
-            "category": "Invitations",
-            "name": "Printed Wedding Cards",
-            "description": "Designer printed cards (500 pcs)",
-            "price": 15000,
-            "package_type": "Standard"
-        },
-        {
-            "id": "s10",
-            "category": "Invitations",
-            "name": "Premium Digital + Print",
-            "description": "Digital invites + premium printed cards",
-            "price": 30000,
-            "package_type": "Premium"
-        },
-        {
-            "id": "s11",
-            "category": "Transportation",
-            "name": "Wedding Car Rental",
-            "description": "Luxury car for bride/groom",
-            "price": 15000,
-            "package_type": "Standard"
-        },
-        {
-            "id": "s12",
-            "category": "Mehendi",
-            "name": "Mehendi Artist",
-            "description": "Professional mehendi for bride + family",
-            "price": 10000,
-            "package_type": "Standard"
+
+    def lookup(self, tier, guest_count):
+        position = bisect.bisect_left([high for _, high in GUEST_BRACKETS], guest_count)
+        bracket = GUEST_BRACKETS[min(position, len(GUEST_BRACKETS) - 1)]
+        entry = self.entries[(tier, bracket)]
+        return {
+            **entry,
+            "guest_count": guest_count,
+            "catering_cost": entry["per_plate_cost"] * guest_count,
+            "total_cost": entry["fixed_cost"] + entry["per_plate_cost"] * guest_count,
         }
-    ]
-    service_categories_collection.insert_many(services)
+
+tier_table = TierTable()
+
+async def ensure_indexes():
+    await repository.ensure_indexes(INDEX_SPEC)
+    report = await repository.index_report(INDEX_SPEC)
+    for name, status in report.items():
+        if status["missing"]:
+            logger.warning("Missing indexes on %s: %s", name, ", ".join(status["missing"]))
+        if status["undeclared"]:
+            logger.warning("Undeclared indexes on %s: %s", name, ", ".join(status["undeclared"]))
+        if status["unused"]:
+            # Access counters reset on mongod restart, so this is only a hint
+            logger.info("Indexes on %s unused since last restart: %s", name, ", ".join(status["unused"]))
+    return report
+
+async def prepare_store():
+    await ensure_indexes()
+    await initialize_database()
+
+async def reconcile_store():
+    # Runs behind a disk snapshot: retried with backoff until the store answers
+    delay = 1.0
+    while True:
+        try:
+            await prepare_store()
+            await catalog_cache.revalidate()
+            logger.info("Catalog reconciled with the store")
+            return
+        except (CatalogUnavailable, *STORE_ERRORS) as e:
+            logger.warning("Store not ready (%s); retrying in %ss", e, delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 60.0)
 
 # Initialize on startup
-initialize_database()
+@app.on_event("startup")
+async def startup():
+    snapshot = load_disk_snapshot()
+    if CATALOG_OFFLINE:
+        catalog_cache.pin(snapshot or seed_snapshot())
+        logger.info("Offline mode: serving catalog v%s without the store", catalog_cache._snapshot.version)
+        return
+    if snapshot is None:
+        await prepare_store()
+        return
+    # Serve the disk copy right away and catch up with the store behind it
+    catalog_cache.prime(snapshot)
+    app.state.reconcile_task = asyncio.create_task(reconcile_store())
+
+@app.on_event("shutdown")
+async def shutdown():
+    task = getattr(app.state, "reconcile_task", None)
+    if task is not None and not task.done():
+        task.cancel()
 
 @app.get("/api/health")
-def health_check():
+async def health_check():
     return {"status": "healthy", "message": "Wedding Planner API is running"}
 
+def encode_cursor(item, sort_field, id_field="id"):
+    return base64.urlsafe_b64encode(encode_json([item.get(sort_field), item[id_field]])).decode("ascii")
+
+def decode_cursor(cursor, value_type=None):
+    # With a value_type the cursor is checked against the stored sort key
+    # types, since in-process backends compare it with them directly
+    try:
+        value, last_id = orjson.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if value_type is not None and not all(isinstance(v, t) and not isinstance(v, bool)
+                                          for v, t in ((value, value_type), (last_id, str))):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return value, last_id
+
+async def list_catalog(name, model, price_field, sort_fields, equals, sort, limit, cursor, fields, format,
+                       always_fields=(), **filters):
+    # always_fields are projected whatever `fields` asks for, e.g. what the
+    # response is grouped by
+    if format not in (None, "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be ndjson or omitted")
+    sort_key = (sort or "id").lstrip("-")
+    if sort_key not in sort_fields:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(sort_fields)}")
+    if limit is not None and not 0 < limit <= MAX_CATALOG_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_CATALOG_PAGE_SIZE}")
+    fields = [f for f in fields.split(",") if f] if fields else None
+    if fields and not set(fields) <= model.model_fields.keys():
+        raise HTTPException(status_code=400, detail=f"fields must be among: {', '.join(model.model_fields)}")
+    if fields:
+        fields += [field for field in always_fields if field not in fields]
+    sort_field = sort_fields[sort_key]
+    catalog_filter = CatalogFilter(
+        price_field,
+        sort_field=sort_field,
+        descending=(sort or "").startswith("-"),
+        after=decode_cursor(cursor, model.model_fields[sort_field].annotation) if cursor else None,
+        limit=limit,
+        fields=fields,
+        equals={key: value for key, value in equals.items() if value is not None},
+        **filters,
+    )
+    async def from_store():
+        return [item async for item in repository.iter_catalog(name, catalog_filter)]
+
+    async def fetch_page():
+        # Returns (items, stale). The pinned offline snapshot is the whole
+        # catalog; otherwise the last good snapshot stands in for the store
+        # while its reads fail or the circuit is open
+        if not CATALOG_OFFLINE:
+            try:
+                return await catalog_breaker.call(from_store, CATALOG_READ_TIMEOUT_SECONDS), False
+            except CatalogUnavailable:
+                pass
+        snapshot = await catalog_cache.get()
+        return apply_catalog_filter(snapshot.collection(name), catalog_filter), not CATALOG_OFFLINE
+
+    # Marked here, not in fetch_page, so requests that joined the flight see it too
+    page, stale = await catalog_listing_flight.do((name, catalog_filter.key()), fetch_page)
+    if stale:
+        mark_request_stale()
+
+    if format == "ndjson":
+        # Read before the response starts, so the stale header can still be set
+        return StreamingResponse((encode_json(item) + b"\n" for item in page), media_type="application/x-ndjson")
+    
+    next_cursor = None
+    if limit and len(page) == limit:
+        next_cursor = encode_cursor(page[-1], catalog_filter.sort_field)
+    return page, next_cursor
+
+@app.get("/api/metrics")
+async def get_metrics():
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/bootstrap")
+async def get_bootstrap(request: Request):
+    # Everything the planner needs on page load; returning clients revalidate
+    # with If-None-Match and get an empty 304 while the catalog is unchanged
+    snapshot = await catalog_cache.get()
+    body, encoding = snapshot.body("bootstrap", negotiate_encoding(request.headers.get("accept-encoding")))
+    # Each encoding is a different representation, so it gets its own strong tag
+    etag = f'"{snapshot.etag}-{encoding}"' if encoding else f'"{snapshot.etag}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+        return Response(status_code=304, headers=headers)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return BufferResponse(content=body, media_type="application/json", headers=headers)
+
 @app.get("/api/venues")
-def get_venues():
-    venues = list(venues_collection.find({}, {"_id": 0}))
-    return {"venues": venues}
+async def get_venues(request: Request, min_price: Optional[int] = None, max_price: Optional[int] = None,
+                     min_capacity: Optional[int] = None, price_range: Optional[str] = None,
+                     sort: Optional[str] = None, limit: Optional[int] = None, cursor: Optional[str] = None,
+                     fields: Optional[str] = None, format: Optional[str] = None):
+    params = (min_price, max_price, min_capacity, price_range, sort, limit, cursor, fields, format)
+    if all(p is None for p in params):
+        return catalog_body_response(request, await catalog_cache.get(), "venues")
+    
+    result = await list_catalog(
+        "venues", VenueOption, "price", {"id": "id", "price": "price", "name": "name"}, {"price_range": price_range},
+        sort, limit, cursor, fields, format,
+        min_price=min_price, max_price=max_price, min_capacity=min_capacity,
+    )
+    if isinstance(result, Response):
+        return result
+    venues, next_cursor = result
+    return ORJSONResponse({"venues": venues, "next_cursor": next_cursor})
 
 @app.get("/api/cuisine-options")
-def get_cuisine_options():
-    cuisines = list(cuisine_options_collection.find({}, {"_id": 0}))
-    return {"cuisines": cuisines}
+async def get_cuisine_options(request: Request, min_price: Optional[int] = None, max_price: Optional[int] = None,
+                              cuisine_type: Optional[str] = None,
+                              sort: Optional[str] = None, limit: Optional[int] = None, cursor: Optional[str] = None,
+                              fields: Optional[str] = None, format: Optional[str] = None):
+    params = (min_price, max_price, cuisine_type, sort, limit, cursor, fields, format)
+    if all(p is None for p in params):
+        return catalog_body_response(request, await catalog_cache.get(), "cuisines")
+    
+    result = await list_catalog(
+        "cuisine_options", CuisineOption, "price_per_plate",
+        {"id": "id", "price": "price_per_plate", "price_per_plate": "price_per_plate", "name": "name"},
+        {"cuisine_type": cuisine_type},
+        sort, limit, cursor, fields, format,
+        min_price=min_price, max_price=max_price,
+    )
+    if isinstance(result, Response):
+        return result
+    cuisines, next_cursor = result
+    return ORJSONResponse({"cuisines": cuisines, "next_cursor": next_cursor})
 
 @app.get("/api/services")
-def get_services():
-    services = list(service_categories_collection.find({}, {"_id": 0}))
-    # Group by category
+async def get_services(request: Request, min_price: Optional[int] = None, max_price: Optional[int] = None,
+                       category: Optional[str] = None, package_type: Optional[str] = None,
+                       sort: Optional[str] = None, limit: Optional[int] = None, cursor: Optional[str] = None,
+                       fields: Optional[str] = None, format: Optional[str] = None):
+    params = (min_price, max_price, category, package_type, sort, limit, cursor, fields, format)
+    if all(p is None for p in params):
+        return catalog_body_response(request, await catalog_cache.get(), "services")
+    
+    result = await list_catalog(
+        "service_categories", ServiceItem, "price", {"id": "id", "price": "price", "name": "name", "category": "category"},
+        {"category": category, "package_type": package_type},
+        sort, limit, cursor, fields, format, always_fields=("category",),
+        min_price=min_price, max_price=max_price,
+    )
+    if isinstance(result, Response):
+        return result
+    services, next_cursor = result
     grouped = {}
     for service in services:
-        category = service["category"]
-        if category not in grouped:
-            grouped[category] = []
-        grouped[category].append(service)
-    return {"services": grouped, "all_services": services}
+        grouped.setdefault(service.get("category"), []).append(service)
+    return ORJSONResponse({"services": grouped, "all_services": services, "next_cursor": next_cursor})
 
-@app.post("/api/calculate-budget")
-def calculate_budget(calculation: BudgetCalculation):
+# Breakdown lines shared by every pricing path
+def venue_line(venue):
+    return {
+        "category": "Venue",
+        "item": venue.name,
+        "cost": venue.price
+    }
+
+def catering_line(cuisine, guest_count):
+    return {
+        "category": "Catering",
+        "item": cuisine.name,
+        "cost": cuisine.price * guest_count,
+        "details": f"{guest_count} guests × ₹{cuisine.price}"
+    }
+
+def service_line(service):
+    return {
+        "category": service.category,
+        "item": service.name,
+        "cost": service.price
+    }
+
+class QuoteLines:
+    # Breakdown lines for the distinct items of a selection; duplicates and
+    # request order are applied when the quote is assembled
+    __slots__ = ("venue", "cuisines", "services", "size")
+
+    def __init__(self, venue, cuisines, services):
+        self.venue = venue
+        self.cuisines = cuisines
+        self.services = services
+        self.size = 0
+
+def quote_lines(calculation, index):
+    venue = index.venues.get(calculation.venue_id) if calculation.venue_id else None
+    cuisines = {}
+    for cuisine_id in calculation.cuisine_ids or ():
+        cuisine = index.cuisines.get(cuisine_id)
+        if cuisine and cuisine_id not in cuisines:
+            cuisines[cuisine_id] = catering_line(cuisine, calculation.guest_count)
+    services = {}
+    for service_id in calculation.service_ids or ():
+        service = index.services.get(service_id)
+        if service and service_id not in services:
+            services[service_id] = service_line(service)
+    return QuoteLines(venue_line(venue) if venue else None, cuisines, services)
+
+def assemble_quote(calculation, lines):
     total = 0
     breakdown = []
     
     # Add venue cost
-    if calculation.venue_id:
-        venue = venues_collection.find_one({"id": calculation.venue_id}, {"_id": 0})
-        if venue:
-            total += venue["price"]
-            breakdown.append({
-                "category": "Venue",
-                "item": venue["name"],
-                "cost": venue["price"]
-            })
+    if lines.venue:
+        total += lines.venue["cost"]
+        breakdown.append(lines.venue)
     
     # Add cuisine cost
-    cuisine_total = 0
-    if calculation.cuisine_ids:
-        for cuisine_id in calculation.cuisine_ids:
-            cuisine = cuisine_options_collection.find_one({"id": cuisine_id}, {"_id": 0})
-            if cuisine:
-                cuisine_cost = cuisine["price_per_plate"] * calculation.guest_count
-                cuisine_total += cuisine_cost
-                breakdown.append({
-                    "category": "Catering",
-                    "item": cuisine["name"],
-                    "cost": cuisine_cost,
-                    "details": f"{calculation.guest_count} guests × ₹{cuisine['price_per_plate']}"
-                })
-    total += cuisine_total
+    for cuisine_id in calculation.cuisine_ids or ():
+        line = lines.cuisines.get(cuisine_id)
+        if line:
+            total += line["cost"]
+            breakdown.append(line)
     
     # Add services cost
-    if calculation.service_ids:
-        for service_id in calculation.service_ids:
-            service = service_categories_collection.find_one({"id": service_id}, {"_id": 0})
-            if service:
-                total += service["price"]
-                breakdown.append({
-                    "category": service["category"],
-                    "item": service["name"],
-                    "cost": service["price"]
-                })
+    for service_id in calculation.service_ids or ():
+        line = lines.services.get(service_id)
+        if line:
+            total += line["cost"]
+            breakdown.append(line)
     
     return {
         "total_cost": total,
@@ -356,30 +2607,539 @@ def calculate_budget(calculation: BudgetCalculation):
         "guest_count": calculation.guest_count
     }
 
-@app.post("/api/wedding-plan")
-def save_wedding_plan(plan: WeddingPlan):
-    plan_id = plan.plan_id or str(uuid.uuid4())
+def price_budget(calculation, index):
+    return assemble_quote(calculation, quote_lines(calculation, index))
+
+# Quote cache: breakdown lines memoized per canonical selection (sorted,
+# de-duplicated ids plus guest count), bounded by an estimate of their size
+QUOTE_CACHE_MAX_BYTES = int(os.environ.get('QUOTE_CACHE_MAX_BYTES', str(8 * 1024 * 1024)))
+QUOTE_ENTRY_OVERHEAD = 400
+
+def quote_key(calculation):
+    return (
+        calculation.guest_count,
+        calculation.venue_id or None,
+        tuple(sorted(set(calculation.cuisine_ids or ()))),
+        tuple(sorted(set(calculation.service_ids or ()))),
+    )
+
+def price_signature(entry):
+    return (entry.name, entry.category, entry.price)
+
+class QuoteCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._keys_by_item = defaultdict(set)
+        self._index = None
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _item_ids(self, key):
+        _, venue_id, cuisine_ids, service_ids = key
+        ids = [("venue", venue_id)] if venue_id else []
+        ids += [("cuisine", cuisine_id) for cuisine_id in cuisine_ids]
+        ids += [("service", service_id) for service_id in service_ids]
+        return ids
+
+    def _drop(self, key):
+        lines = self._entries.pop(key)
+        self.bytes -= lines.size
+        for item in self._item_ids(key):
+            keys = self._keys_by_item[item]
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_item[item]
+
+    def _sync(self, index):
+        # Drop quotes that reference an item whose line would now differ,
+        # including ids that were unknown before and have since been added
+        previous = self._index
+        self._index = index
+        if previous is None:
+            self.clear()
+            return
+        changed = []
+        for kind, old, new in (
+            ("venue", previous.venues, index.venues),
+            ("cuisine", previous.cuisines, index.cuisines),
+            ("service", previous.services, index.services),
+        ):
+            for item_id in old.keys() | new.keys():
+                old_entry = old.get(item_id)
+                new_entry = new.get(item_id)
+                if old_entry is None or new_entry is None or price_signature(old_entry) != price_signature(new_entry):
+                    changed.append((kind, item_id))
+        for item in changed:
+            for key in list(self._keys_by_item.get(item, ())):
+                self._drop(key)
+                self.invalidations += 1
+
+    def quote(self, calculation, index):
+        if self.max_bytes <= 0:
+            return price_budget(calculation, index)
+        if index is not self._index:
+            self._sync(index)
+        key = quote_key(calculation)
+        lines = self._entries.get(key)
+        if lines is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return assemble_quote(calculation, lines)
+
+        self.misses += 1
+        lines = quote_lines(calculation, index)
+        lines.size = QUOTE_ENTRY_OVERHEAD + len(encode_json([lines.venue, lines.cuisines, lines.services]))
+        self._entries[key] = lines
+        self.bytes += lines.size
+        for item in self._item_ids(key):
+            self._keys_by_item[item].add(key)
+        while self.bytes > self.max_bytes and self._entries:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+        return assemble_quote(calculation, lines)
+
+    def clear(self):
+        self._entries.clear()
+        self._keys_by_item.clear()
+        self.bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def render_metrics(self):
+        return [
+            "# TYPE quote_cache_hits_total counter",
+            f"quote_cache_hits_total {self.hits}",
+            "# TYPE quote_cache_misses_total counter",
+            f"quote_cache_misses_total {self.misses}",
+            "# TYPE quote_cache_evictions_total counter",
+            f"quote_cache_evictions_total {self.evictions}",
+            "# TYPE quote_cache_invalidations_total counter",
+            f"quote_cache_invalidations_total {self.invalidations}",
+            "# TYPE quote_cache_entries gauge",
+            f"quote_cache_entries {len(self._entries)}",
+            "# TYPE quote_cache_bytes gauge",
+            f"quote_cache_bytes {self.bytes}",
+        ]
+
+quote_cache = QuoteCache(QUOTE_CACHE_MAX_BYTES)
+metrics.register(quote_cache.render_metrics)
+
+@app.post("/api/calculate-budget")
+async def calculate_budget(calculation: BudgetCalculation):
+    index = await catalog_cache.price_index()
+    if index is None:
+        # Cold process: targeted lookups, not worth caching against a partial index
+        return ORJSONResponse(price_budget(calculation, await fetch_price_index(calculation)))
+    return ORJSONResponse(quote_cache.quote(calculation, index))
+
+@app.post("/api/calculate-budget/batch")
+async def calculate_budget_batch(batch: BatchBudgetCalculation):
+    if len(batch.scenarios) > MAX_BATCH_SCENARIOS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_SCENARIOS} scenarios per batch")
+    snapshot = await catalog_cache.get()
+    
+    if batch.include_breakdown:
+        results = [price_budget(calculation, snapshot.price_index) for calculation in batch.scenarios]
+    else:
+        totals = snapshot.price_vectors.totals(batch.scenarios).tolist()
+        results = [
+            {"total_cost": total, "guest_count": calculation.guest_count}
+            for calculation, total in zip(batch.scenarios, totals)
+        ]
+    
+    return ORJSONResponse({"results": results, "count": len(results)})
+
+@app.post("/api/optimize-plan")
+async def optimize_plan(request: OptimizePlanRequest):
+    snapshot = await catalog_cache.get()
+    unknown = set(request.required_categories) - {"Venue", "Catering"} - snapshot.services_by_category.keys()
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown required categories: {', '.join(sorted(unknown))}")
+    plans = []
+    # The DP is CPU-bound; keep the event loop serving other requests meanwhile
+    for value, selection in await asyncio.to_thread(optimize_plans, snapshot, request):
+        calculation = BudgetCalculation(
+            guest_count=request.guest_count,
+            venue_id=selection.pop("Venue", None),
+            cuisine_ids=[selection.pop("Catering")] if "Catering" in selection else [],
+            service_ids=list(selection.values()),
+        )
+        quote = price_budget(calculation, snapshot.price_index)
+        plans.append({
+            "value": value,
+            "venue_id": calculation.venue_id,
+            "cuisine_ids": calculation.cuisine_ids,
+            "service_ids": calculation.service_ids,
+            "total_cost": quote["total_cost"],
+            "remaining_budget": request.total_budget - quote["total_cost"],
+            "breakdown": quote["breakdown"],
+        })
+    return ORJSONResponse({"plans": plans, "guest_count": request.guest_count, "total_budget": request.total_budget})
+
+@app.post("/api/cost-curve")
+async def cost_curve(request: CostCurveRequest):
+    if request.max_guests < request.min_guests:
+        raise HTTPException(status_code=400, detail="max_guests must not be below min_guests")
+    if (request.max_guests - request.min_guests) // request.step + 1 > MAX_CURVE_POINTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_CURVE_POINTS} points per curve")
+    snapshot = await catalog_cache.get()
+    
+    # One pricing pass for the selection; only catering scales with guests
+    venue_cost, per_plate, services_cost = (int(v[0]) for v in snapshot.price_vectors.components([request]))
+    guests = np.arange(request.min_guests, request.max_guests + 1, request.step, dtype=np.int64)
+    catering = guests * per_plate
+    fixed_cost = venue_cost + services_cost
+    
+    min_capacity, max_capacity = snapshot.venue_capacity.get(request.venue_id, (0, None))
+    over_capacity = guests > max_capacity if max_capacity is not None else np.zeros(len(guests), dtype=bool)
+    return ORJSONResponse({
+        "guest_counts": guests.tolist(),
+        "total_cost": (catering + fixed_cost).tolist(),
+        "catering_cost": catering.tolist(),
+        "fixed_cost": fixed_cost,
+        "venue_cost": venue_cost,
+        "services_cost": services_cost,
+        "per_plate_cost": per_plate,
+        "venue_capacity": {"min": min_capacity, "max": max_capacity} if request.venue_id in snapshot.venue_capacity else None,
+        "over_capacity": over_capacity.tolist(),
+    })
+
+@app.get("/api/tiers")
+async def get_tiers(tier: Optional[str] = None, guest_count: Optional[int] = None):
+    tier_table.sync(await catalog_cache.get())
+    if tier is None and guest_count is None:
+        return ORJSONResponse({"tiers": list(tier_table.entries.values())})
+    if tier not in PACKAGE_TIERS:
+        raise HTTPException(status_code=400, detail=f"tier must be one of: {', '.join(PACKAGE_TIERS)}")
+    if guest_count is None or guest_count < 0:
+        raise HTTPException(status_code=400, detail="guest_count must be a non-negative integer")
+    return ORJSONResponse(tier_table.lookup(tier, guest_count))
+
+def build_plan_document(plan, keep_timestamps=False):
     plan_data = plan.dict()
-    plan_data["plan_id"] = plan_id
-    plan_data["updated_at"] = datetime.now().isoformat()
+    plan_data["plan_id"] = plan.plan_id or str(uuid.uuid4())
+    # Imports keep the record's own timestamps so migrated plans list in
+    # their original order and an export/import round trip is lossless
+    if not (keep_timestamps and plan.updated_at):
+        plan_data["updated_at"] = datetime.now().isoformat()
     
     if not plan.created_at:
         plan_data["created_at"] = datetime.now().isoformat()
+    return plan_data
+
+@app.post("/api/wedding-plan")
+async def save_wedding_plan(plan: WeddingPlan):
+    plan_data = build_plan_document(plan)
+    await repository.save_plan(plan_data["plan_id"], plan_data)
     
-    wedding_plans_collection.update_one(
-        {"plan_id": plan_id},
-        {"$set": plan_data},
-        upsert=True
-    )
-    
-    return {"message": "Wedding plan saved successfully", "plan_id": plan_id}
+    return {"message": "Wedding plan saved successfully", "plan_id": plan_data["plan_id"]}
+
+class ImportReport:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.processed = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+    def summary(self, count_key):
+        elapsed = time.perf_counter() - self.started
+        succeeded = self.processed - self.failed
+        return {
+            count_key: succeeded,
+            "failed": self.failed,
+            "errors": self.errors,
+            "elapsed_seconds": round(elapsed, 3),
+            "records_per_second": round(succeeded / elapsed, 1) if elapsed else None,
+        }
+
+async def iter_ndjson_lines(request):
+    # Only each new chunk is split; a line longer than MAX_IMPORT_LINE_BYTES
+    # is dropped up to its newline and yielded as None
+    partial = []
+    size = 0
+    async for chunk in request.stream():
+        *lines, tail = chunk.split(b"\n")
+        for line in lines:
+            size += len(line)
+            if partial is None or size > MAX_IMPORT_LINE_BYTES:
+                yield None
+            else:
+                yield b"".join(partial) + line if partial else line
+            partial = []
+            size = 0
+        size += len(tail)
+        if partial is None or not tail:
+            continue
+        if size > MAX_IMPORT_LINE_BYTES:
+            partial = None
+        else:
+            partial.append(tail)
+    if partial is None:
+        yield None
+    elif partial:
+        yield b"".join(partial)
+
+@app.post("/api/wedding-plans/import")
+async def import_wedding_plans(request: Request):
+    # NDJSON body, one WeddingPlan per line; written in unordered bulk upserts
+    report = ImportReport()
+    batch = []
+    batch_lines = []
+
+    async def flush():
+        for position, message in await repository.bulk_save_plans(batch):
+            report.error(batch_lines[position], message)
+        batch.clear()
+        batch_lines.clear()
+
+    line_number = 0
+    async for line in iter_ndjson_lines(request):
+        line_number += 1
+        if line is None:
+            report.processed += 1
+            report.error(line_number, f"Line longer than {MAX_IMPORT_LINE_BYTES} bytes")
+            continue
+        if not line.strip():
+            continue
+        try:
+            record = orjson.loads(line)
+        except orjson.JSONDecodeError as e:
+            report.processed += 1
+            report.error(line_number, f"Invalid JSON: {e}")
+            continue
+        if isinstance(record, dict) and "export_summary" in record:
+            continue
+        report.processed += 1
+        try:
+            plan = WeddingPlan.model_validate(record)
+        except ValidationError as e:
+            report.error(line_number, "; ".join(
+                f"{'.'.join(map(str, error['loc'])) or 'record'}: {error['msg']}" for error in e.errors()))
+            continue
+        batch.append(build_plan_document(plan, keep_timestamps=True))
+        batch_lines.append(line_number)
+        if len(batch) >= PLAN_IMPORT_BATCH_SIZE:
+            await flush()
+    if batch:
+        await flush()
+
+    return report.summary("imported")
+
+@app.get("/api/wedding-plans/export")
+async def export_wedding_plans():
+    # NDJSON stream read from a cursor in batches; the last line is a summary
+    async def lines():
+        report = ImportReport()
+        async for plan in repository.iter_plans(PLAN_EXPORT_BATCH_SIZE):
+            report.processed += 1
+            try:
+                yield orjson.dumps(plan) + b"\n"
+            except TypeError as e:
+                report.error(report.processed, f"{plan.get('plan_id')}: {e}")
+        yield orjson.dumps({"export_summary": report.summary("exported")}) + b"\n"
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.get("/api/wedding-plans")
+async def list_wedding_plans(min_guests: Optional[int] = None, max_guests: Optional[int] = None,
+                             min_budget: Optional[int] = None, max_budget: Optional[int] = None,
+                             limit: int = DEFAULT_PLAN_PAGE_SIZE, cursor: Optional[str] = None):
+    # Plan summaries, newest first, paginated by (updated_at, plan_id)
+    if not 0 < limit <= MAX_PLAN_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_PLAN_PAGE_SIZE}")
+    plan_filter = PlanFilter(min_guests, max_guests, min_budget, max_budget,
+                             after=decode_cursor(cursor, str) if cursor else None, limit=limit)
+    plans = await repository.list_plans(plan_filter)
+    next_cursor = encode_cursor(plans[-1], "updated_at", "plan_id") if len(plans) == limit else None
+    return ORJSONResponse({"plans": plans, "next_cursor": next_cursor})
 
 @app.get("/api/wedding-plan/{plan_id}")
-def get_wedding_plan(plan_id: str):
-    plan = wedding_plans_collection.find_one({"plan_id": plan_id}, {"_id": 0})
+async def get_wedding_plan(plan_id: str):
+    plan = await plan_flight.do(plan_id, lambda: repository.get_plan(plan_id))
     if not plan:
         raise HTTPException(status_code=404, detail="Wedding plan not found")
-    return plan
+    return ORJSONResponse(plan)
+
+# Live budget session: the client sends small deltas, the server keeps the
+# selection and answers with only the lines that changed and the new total.
+# Messages are validated in full before any of them is applied. The
+# selection is a set: unlike /api/calculate-budget, an id sent twice (in a
+# reset or across adds) is priced once.
+class SessionSelection(BaseModel):
+    guest_count: Optional[int] = Field(default=None, ge=0, le=MAX_GUEST_COUNT)
+    venue_id: Optional[str] = None
+    cuisine_ids: Optional[List[str]] = None
+    service_ids: Optional[List[str]] = None
+
+class SessionMessage(BaseModel):
+    reset: Optional[SessionSelection] = None
+    guest_count: Optional[int] = Field(default=None, ge=0, le=MAX_GUEST_COUNT)
+    venue_id: Optional[str] = None
+    add: Union[str, List[str], None] = None
+    remove: Union[str, List[str], None] = None
+
+class BudgetSession:
+    def __init__(self):
+        self.guest_count = 0
+        self.venue_id = None
+        self.cuisine_ids = []
+        self.service_ids = []
+        self.lines = {}
+        self.total = 0
+        self.catalog_etag = None  # version counters restart per store; the ETag carries a digest
+
+    def keys(self):
+        keys = [f"venue:{self.venue_id}"] if self.venue_id else []
+        keys += [f"cuisine:{cuisine_id}" for cuisine_id in self.cuisine_ids]
+        keys += [f"service:{service_id}" for service_id in self.service_ids]
+        return keys
+
+    def _price(self, key, index):
+        kind, item_id = key.split(":", 1)
+        if kind == "venue":
+            return venue_line(index.venues[item_id])
+        if kind == "cuisine":
+            return catering_line(index.cuisines[item_id], self.guest_count)
+        return service_line(index.services[item_id])
+
+    def _set_line(self, key, index, changed):
+        line = self._price(key, index)
+        old = self.lines.get(key)
+        if old != line:
+            self.total += line["cost"] - (old["cost"] if old else 0)
+            self.lines[key] = line
+            changed[key] = line
+
+    def _drop_line(self, key, removed):
+        old = self.lines.pop(key, None)
+        if old:
+            self.total -= old["cost"]
+            removed.append(key)
+
+    def _add(self, item_id, index, changed, removed, ignored):
+        if item_id in index.venues:
+            if self.venue_id:
+                self._drop_line(f"venue:{self.venue_id}", removed)
+            self.venue_id = item_id
+            self._set_line(f"venue:{item_id}", index, changed)
+        elif item_id in index.cuisines:
+            if item_id not in self.cuisine_ids:
+                self.cuisine_ids.append(item_id)
+                self._set_line(f"cuisine:{item_id}", index, changed)
+        elif item_id in index.services:
+            if item_id not in self.service_ids:
+                self.service_ids.append(item_id)
+                self._set_line(f"service:{item_id}", index, changed)
+        else:
+            ignored.append(item_id)
+
+    def _remove(self, item_id, removed):
+        if item_id == self.venue_id:
+            self.venue_id = None
+            self._drop_line(f"venue:{item_id}", removed)
+        elif item_id in self.cuisine_ids:
+            self.cuisine_ids.remove(item_id)
+            self._drop_line(f"cuisine:{item_id}", removed)
+        elif item_id in self.service_ids:
+            self.service_ids.remove(item_id)
+            self._drop_line(f"service:{item_id}", removed)
+
+    def apply(self, message, snapshot):
+        index = snapshot.price_index
+        changed = {}
+        removed = []
+        ignored = []
+        order = self.keys()
+        present = message.model_fields_set
+        reset = "reset" in present or snapshot.etag != self.catalog_etag
+        added = as_list(message.add)
+
+        if "reset" in present:
+            state = message.reset or SessionSelection()
+            self.guest_count = state.guest_count or 0
+            self.venue_id = None
+            self.cuisine_ids = []
+            self.service_ids = []
+            ids = [state.venue_id] + list(state.cuisine_ids or []) + list(state.service_ids or [])
+            added = [item_id for item_id in ids if item_id] + added
+        if reset:
+            # Start from scratch, also when the catalog changed under the session
+            if self.venue_id not in index.venues:
+                self.venue_id = None
+            self.cuisine_ids = [cuisine_id for cuisine_id in self.cuisine_ids if cuisine_id in index.cuisines]
+            self.service_ids = [service_id for service_id in self.service_ids if service_id in index.services]
+            self.lines = {}
+            self.total = 0
+            self.catalog_etag = snapshot.etag
+            for key in self.keys():
+                self._set_line(key, index, changed)
+
+        if message.guest_count is not None:
+            self.guest_count = message.guest_count
+            for cuisine_id in self.cuisine_ids:
+                self._set_line(f"cuisine:{cuisine_id}", index, changed)
+        if "venue_id" in present:
+            if self.venue_id:
+                self._remove(self.venue_id, removed)
+            if message.venue_id:
+                self._add(message.venue_id, index, changed, removed, ignored)
+        for item_id in as_list(message.remove):
+            self._remove(item_id, removed)
+        for item_id in added:
+            self._add(item_id, index, changed, removed, ignored)
+
+        update = {
+            "lines": changed,
+            "removed": [key for key in removed if key not in changed],
+            "total_cost": self.total,
+            "guest_count": self.guest_count,
+        }
+        if reset:
+            update["reset"] = True
+        if reset or self.keys() != order:
+            update["order"] = self.keys()
+        if ignored:
+            update["ignored"] = ignored
+        return update
+
+def as_list(value):
+    if value is None:
+        return []
+    return [value] if isinstance(value, str) else list(value)
+
+@app.websocket("/api/budget-session")
+async def budget_session(websocket: WebSocket):
+    await websocket.accept()
+    session = BudgetSession()
+    try:
+        while True:
+            try:
+                message = SessionMessage.model_validate(orjson.loads(await websocket.receive_text()))
+                update = session.apply(message, await catalog_cache.get())
+            except (ValueError, TypeError, CatalogUnavailable) as e:
+                update = {"error": str(e)}
+            await websocket.send_text(encode_json(update).decode("utf-8"))
+    except WebSocketDisconnect:
+        pass
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Load Benchmark for Budget Wedding Planner
+Runs the backend in-process and reports throughput and latency per endpoint
+(every HTTP route; the /api/budget-session websocket is not covered)
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+import httpx
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+VENUE_IDS = ["v1", "v2", "v3", "v4"]
+CUISINE_IDS = ["c1", "c2", "c3", "c4", "c5"]
+SERVICE_IDS = [f"s{i}" for i in range(1, 13)]
+SERVICE_CATEGORIES = ["Photography", "Decorations", "Entertainment", "Makeup", "Invitations"]
+TIERS = ["budget", "mid-range", "premium"]
+
+# Weighted request mixes; each entry is (weight, scenario name)
+MIXES = {
+    "bootstrap": [(1, "bootstrap")],
+    "catalog": [(1, "catalog")],
+    "budget_burst": [(1, "budget")],
+    "filtered_catalog": [(1, "filtered_catalog")],
+    "plans": [(1, "plan_save_read")],
+    "plan_transfer": [(1, "plan_transfer")],
+    "planning": [(2, "optimize"), (2, "cost_curve"), (1, "tiers")],
+    "mixed": [(2, "bootstrap"), (6, "budget"), (1, "plan_save_read"), (1, "batch"), (1, "filtered_catalog"),
+              (1, "optimize"), (1, "cost_curve"), (1, "tiers"), (1, "status")],
+}
+
+
+def load_app(backend):
+    """Import the backend against the chosen storage backend"""
+    os.environ["STORAGE_BACKEND"] = "memory" if backend == "memory" else "mongo"
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017/wedding_planner_bench")
+    # Measure the store path, not a catalog left on disk by an earlier run
+    os.environ.setdefault("CATALOG_SNAPSHOT_PATH", "")
+
+    sys.path.insert(0, BACKEND_DIR)
+    import server
+    return server.app
+
+
+def random_selection(rng):
+    return {
+        "guest_count": rng.randrange(100, 1001, 10),
+        "venue_id": rng.choice(VENUE_IDS),
+        "cuisine_ids": rng.sample(CUISINE_IDS, rng.randint(1, 2)),
+        "service_ids": rng.sample(SERVICE_IDS, rng.randint(2, 8)),
+    }
+
+
+class LoadBenchmark:
+    def __init__(self, app, mix, concurrency, duration, seed):
+        self.app = app
+        self.mix = MIXES[mix]
+        self.concurrency = concurrency
+        self.duration = duration
+        self.seed = seed
+        self.latencies = defaultdict(list)
+        self.failures = defaultdict(int)
+
+    async def timed(self, client, label, method, url, **kwargs):
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.latencies[label].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.failures[label] += 1
+        return response
+
+    async def run_scenario(self, client, name, rng):
+        if name == "catalog":
+            await asyncio.gather(
+                self.timed(client, "GET /api/venues", "GET", "/api/venues"),
+                self.timed(client, "GET /api/cuisine-options", "GET", "/api/cuisine-options"),
+                self.timed(client, "GET /api/services", "GET", "/api/services"),
+            )
+        elif name == "bootstrap":
+            # First visit, then a returning client revalidating its copy
+            response = await self.timed(client, "GET /api/bootstrap", "GET", "/api/bootstrap")
+            await self.timed(client, "GET /api/bootstrap (304)", "GET", "/api/bootstrap",
+                             headers={"If-None-Match": response.headers.get("etag", "")})
+        elif name == "budget":
+            # A burst of recalculations, like dragging the guest slider
+            selection = random_selection(rng)
+            for _ in range(rng.randint(3, 10)):
+                selection["guest_count"] = rng.randrange(100, 1001, 10)
+                await self.timed(client, "POST /api/calculate-budget", "POST", "/api/calculate-budget", json=selection)
+        elif name == "batch":
+            scenarios = [random_selection(rng) for _ in range(100)]
+            await self.timed(client, "POST /api/calculate-budget/batch", "POST", "/api/calculate-budget/batch",
+                             json={"scenarios": scenarios})
+        elif name == "filtered_catalog":
+            # Filtered, sorted and projected listings, then the next page by cursor
+            await self.timed(client, "GET /api/venues (filtered)", "GET", "/api/venues",
+                             params={"min_capacity": rng.randrange(100, 801, 50), "sort": "price"})
+            await self.timed(client, "GET /api/services (filtered)", "GET", "/api/services",
+                             params={"category": rng.choice(SERVICE_CATEGORIES), "fields": "name,price"})
+            response = await self.timed(client, "GET /api/cuisine-options (page)", "GET", "/api/cuisine-options",
+                                        params={"sort": "price", "limit": 2})
+            cursor = response.json().get("next_cursor") if response.status_code == 200 else None
+            if cursor:
+                await self.timed(client, "GET /api/cuisine-options (page)", "GET", "/api/cuisine-options",
+                                 params={"sort": "price", "limit": 2, "cursor": cursor})
+        elif name == "optimize":
+            request = {"guest_count": rng.randrange(100, 1001, 10), "total_budget": rng.randrange(500000, 3000001, 50000),
+                       "required_categories": ["Venue", "Catering", rng.choice(SERVICE_CATEGORIES)]}
+            await self.timed(client, "POST /api/optimize-plan", "POST", "/api/optimize-plan", json=request)
+        elif name == "cost_curve":
+            selection = random_selection(rng)
+            del selection["guest_count"]
+            await self.timed(client, "POST /api/cost-curve", "POST", "/api/cost-curve",
+                             json={**selection, "min_guests": 50, "max_guests": 1000, "step": 10})
+        elif name == "tiers":
+            await self.timed(client, "GET /api/tiers", "GET", "/api/tiers",
+                             params={"tier": rng.choice(TIERS), "guest_count": rng.randrange(0, 1001, 10)})
+        elif name == "status":
+            await self.timed(client, "GET /api/health", "GET", "/api/health")
+            await self.timed(client, "GET /api/metrics", "GET", "/api/metrics")
+        elif name == "plan_transfer":
+            # Import a batch of plans, page through the listing, then export everything
+            plans = b"".join(json.dumps({"guest_count": rng.randrange(100, 1001, 10),
+                                         "total_budget": rng.randrange(500000, 2000001, 50000)}).encode() + b"\n"
+                             for _ in range(50))
+            await self.timed(client, "POST /api/wedding-plans/import", "POST", "/api/wedding-plans/import",
+                             content=plans, headers={"Content-Type": "application/x-ndjson"})
+            await self.timed(client, "GET /api/wedding-plans", "GET", "/api/wedding-plans",
+                             params={"min_guests": 300, "limit": 20})
+            await self.timed(client, "GET /api/wedding-plans/export", "GET", "/api/wedding-plans/export")
+        elif name == "plan_save_read":
+            selection = random_selection(rng)
+            plan = {"guest_count": selection["guest_count"], "total_budget": rng.randrange(500000, 2000001, 50000)}
+            response = await self.timed(client, "POST /api/wedding-plan", "POST", "/api/wedding-plan", json=plan)
+            if response.status_code == 200:
+                plan_id = response.json()["plan_id"]
+                await self.timed(client, "GET /api/wedding-plan/{plan_id}", "GET", f"/api/wedding-plan/{plan_id}")
+
+    async def worker(self, client, worker_id, deadline):
+        rng = random.Random(self.seed * 1000 + worker_id)
+        weights = [weight for weight, _ in self.mix]
+        names = [name for _, name in self.mix]
+        while time.perf_counter() < deadline:
+            await self.run_scenario(client, rng.choices(names, weights)[0], rng)
+
+    async def run(self):
+        await self.app.router.startup()
+        transport = httpx.ASGITransport(app=self.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            # Warm caches so the first measured requests are not cold-start outliers
+            for name in set(name for _, name in self.mix):
+                await self.run_scenario(client, name, random.Random(self.seed))
+            self.latencies.clear()
+            self.failures.clear()
+
+            started = time.perf_counter()
+            deadline = started + self.duration
+            await asyncio.gather(*(self.worker(client, i, deadline) for i in range(self.concurrency)))
+            elapsed = time.perf_counter() - started
+        await self.app.router.shutdown()
+        return self.summarize(elapsed)
+
+    def summarize(self, elapsed):
+        results = {}
+        for label, samples in sorted(self.latencies.items()):
+            samples.sort()
+            results[label] = {
+                "requests": len(samples),
+                "failures": self.failures[label],
+                "req_per_sec": round(len(samples) / elapsed, 1),
+                "p50_ms": round(percentile(samples, 50) * 1000, 2),
+                "p95_ms": round(percentile(samples, 95) * 1000, 2),
+                "p99_ms": round(percentile(samples, 99) * 1000, 2),
+            }
+        return results
+
+
+def percentile(sorted_samples, pct):
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, int(round(pct / 100 * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+def print_results(results):
+    print(f"{'Endpoint':<38}{'Requests':>10}{'Fail':>6}{'Req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    print("-" * 94)
+    for label, r in results.items():
+        print(f"{label:<38}{r['requests']:>10}{r['failures']:>6}{r['req_per_sec']:>10}"
+              f"{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}")
+
+
+def compare_to_baseline(results, baseline, tolerance, min_delta_ms):
+    """Return a list of regressions beyond the tolerance (a fraction, e.g. 0.15)
+    and, for latencies, also beyond min_delta_ms so sub-millisecond jitter is ignored"""
+    regressions = []
+    for label, current in results.items():
+        previous = baseline.get(label)
+        if not previous:
+            continue
+        if current["req_per_sec"] < previous["req_per_sec"] * (1 - tolerance):
+            regressions.append(f"{label}: {previous['req_per_sec']} -> {current['req_per_sec']} req/s")
+        for key in ("p95_ms", "p99_ms"):
+            if current[key] > max(previous[key] * (1 + tolerance), previous[key] + min_delta_ms):
+                regressions.append(f"{label}: {key} {previous[key]} -> {current[key]}")
+    return regressions
+
+
+def main():
+    """Main benchmark execution"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backend", choices=["memory", "mongod"], default="memory",
+                        help="memory uses the in-process storage backend, mongod uses MONGO_URL")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="mixed")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of measured load")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed regression as a fraction")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="latency increases smaller than this never count as regressions")
+    args = parser.parse_args()
+
+    app = load_app(args.backend)
+    print(f"🚀 Benchmarking mix '{args.mix}' with {args.concurrency} workers for {args.duration}s ({args.backend})")
+    print("=" * 94)
+    results = asyncio.run(LoadBenchmark(app, args.mix, args.concurrency, args.duration, args.seed).run())
+    print_results(results)
+
+    # Results only compare at the same load, so the settings are part of the key
+    key = f"{args.backend}/{args.mix}/c{args.concurrency}/d{args.duration:g}"
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baselines = json.load(f)
+
+    if args.save_baseline:
+        baselines[key] = results
+        with open(args.baseline, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"\n💾 Saved baseline '{key}' to {args.baseline}")
+        return
+
+    if key not in baselines:
+        print(f"\nℹ️  No baseline for '{key}' in {args.baseline}; run with --save-baseline to record one")
+        return
+
+    regressions = compare_to_baseline(results, baselines[key], args.tolerance, args.min_delta_ms)
+    if regressions:
+        print(f"\n💥 Regressions beyond {args.tolerance:.0%} against baseline '{key}':")
+        for regression in regressions:
+            print(f"  - {regression}")
+        sys.exit(1)
+    print(f"\n🎉 No regressions beyond {args.tolerance:.0%} against baseline '{key}'")
+
+
+if __name__ == "__main__":
+    main()
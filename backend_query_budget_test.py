@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Query Budget Tests for Budget Wedding Planner
+Runs the app in-process with QUERY_BUDGET_MODE=raise and checks that routes
+stay within their store round-trip budgets and that N+1 access fails
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+os.environ["QUERY_BUDGET_MODE"] = "raise"
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+os.environ["CATALOG_SNAPSHOT_PATH"] = ""
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import server  # noqa: E402
+
+N_PLUS_ONE_ROUTE = "/api/test/plans-one-by-one"
+
+
+async def plans_one_by_one():
+    # Deliberate N+1: one get_plan round trip per plan
+    plan_ids = [plan["plan_id"] async for plan in server.repository.iter_plans(100)]
+    return [await server.repository.get_plan(plan_id) for plan_id in plan_ids]
+
+
+class QueryBudgetTester:
+    def __init__(self, client):
+        self.client = client
+        self.passed = 0
+        self.failed = 0
+
+    def check(self, test_name, condition, details=None):
+        if condition:
+            self.passed += 1
+            print(f"✅ PASS: {test_name}")
+        else:
+            self.failed += 1
+            print(f"❌ FAIL: {test_name}")
+            if details is not None:
+                print(f"   Details: {details}")
+
+    def test_routes_within_budget(self):
+        server.catalog_cache.invalidate()
+        for path in ("/api/venues", "/api/venues?sort=price&limit=2", "/api/bootstrap"):
+            response = self.client.get(path)
+            self.check(f"GET {path} stays within budget", response.status_code == 200, response.text[:200])
+        response = self.client.post("/api/calculate-budget", json={
+            "guest_count": 200, "venue_id": "v1", "cuisine_ids": ["c5"], "service_ids": ["s1", "s3"]})
+        self.check("POST /api/calculate-budget stays within budget", response.status_code == 200, response.text[:200])
+        response = self.client.post("/api/wedding-plan", json={"guest_count": 100, "total_budget": 500000})
+        self.check("POST /api/wedding-plan stays within budget", response.status_code == 200, response.text[:200])
+        response = self.client.get(f"/api/wedding-plan/{response.json()['plan_id']}")
+        self.check("GET /api/wedding-plan/{plan_id} stays within budget", response.status_code == 200,
+                   response.text[:200])
+
+    def test_n_plus_one_fails(self):
+        for i in range(server.DEFAULT_QUERY_BUDGET + 1):
+            self.client.post("/api/wedding-plan", json={"guest_count": i, "total_budget": 1000 * i})
+        response = self.client.get(N_PLUS_ONE_ROUTE)
+        self.check("N+1 route fails in raise mode", response.status_code == 500, response.status_code)
+        self.check("Failure names the route and its budget",
+                   N_PLUS_ONE_ROUTE in response.json().get("detail", "") and "budget" in response.json()["detail"],
+                   response.text[:200])
+
+        server.QUERY_BUDGET_MODE = "warn"
+        try:
+            response = self.client.get(N_PLUS_ONE_ROUTE)
+        finally:
+            server.QUERY_BUDGET_MODE = "raise"
+        self.check("N+1 route is flagged in warn mode",
+                   response.status_code == 200 and response.headers.get("x-query-budget-exceeded") == "true",
+                   (response.status_code, dict(response.headers)))
+
+    def run_all_tests(self):
+        self.test_routes_within_budget()
+        self.test_n_plus_one_fails()
+        return self.failed == 0
+
+
+def main():
+    """Main test execution"""
+    print("🚀 Starting Query Budget Tests")
+    print("=" * 60)
+    server.app.add_api_route(N_PLUS_ONE_ROUTE, plans_one_by_one)
+    with TestClient(server.app) as client:
+        success = QueryBudgetTester(client).run_all_tests()
+    if success:
+        print("\n🎉 Every route stays within its query budget.")
+        sys.exit(0)
+    print("\n💥 Some query budget checks failed. Check the details above.")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Live Budget Session Tests for Budget Wedding Planner
+Drives /api/budget-session in-process and checks every update against
+POST /api/calculate-budget for the same selection
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+os.environ["CATALOG_SNAPSHOT_PATH"] = ""
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import server  # noqa: E402
+
+
+class BudgetSessionTester:
+    def __init__(self, client, socket):
+        self.client = client
+        self.socket = socket
+        self.passed = 0
+        self.failed = 0
+        # The selection the server should hold, mirrored here
+        self.selection = {"guest_count": 0, "venue_id": None, "cuisine_ids": [], "service_ids": []}
+
+    def check(self, test_name, condition, details=None):
+        if condition:
+            self.passed += 1
+            print(f"✅ PASS: {test_name}")
+        else:
+            self.failed += 1
+            print(f"❌ FAIL: {test_name}")
+            if details is not None:
+                print(f"   Details: {details}")
+
+    def send(self, message):
+        self.socket.send_json(message)
+        return self.socket.receive_json()
+
+    def expected_total(self):
+        return self.client.post("/api/calculate-budget", json=self.selection).json()["total_cost"]
+
+    def check_total(self, test_name, update):
+        expected = self.expected_total()
+        self.check(test_name, update.get("total_cost") == expected, (update, expected))
+
+    def test_deltas(self):
+        update = self.send({"reset": {"guest_count": 200, "venue_id": "v1", "cuisine_ids": ["c5"],
+                                      "service_ids": ["s1", "s3"]}})
+        self.selection.update(guest_count=200, venue_id="v1", cuisine_ids=["c5"], service_ids=["s1", "s3"])
+        self.check_total("Reset prices the whole selection", update)
+        self.check("Reset lists every line in order",
+                   update.get("reset") and update.get("order") == ["venue:v1", "cuisine:c5", "service:s1", "service:s3"],
+                   update)
+
+        update = self.send({"guest_count": 350})
+        self.selection["guest_count"] = 350
+        self.check_total("Guest count change reprices catering", update)
+        self.check("Only the catering line is sent", list(update["lines"]) == ["cuisine:c5"], update)
+
+        update = self.send({"venue_id": "v2", "add": ["s7", "c3"], "remove": "s1"})
+        self.selection.update(venue_id="v2", cuisine_ids=["c5", "c3"], service_ids=["s3", "s7"])
+        self.check_total("Venue switch, adds and removes in one message", update)
+        self.check("Removed lines are reported", set(update["removed"]) == {"venue:v1", "service:s1"}, update)
+
+    def test_reset_with_add(self):
+        update = self.send({"reset": {"guest_count": 100, "venue_id": "v1"}, "add": "s2"})
+        self.selection.update(guest_count=100, venue_id="v1", cuisine_ids=[], service_ids=["s2"])
+        self.check_total("Adds alongside a reset are applied", update)
+
+    def test_invalid_messages(self):
+        before = self.expected_total()
+        for message in ({"reset": [1]}, {"guest_count": 300, "add": [{"id": "s1"}]}, {"guest_count": -5}, [1]):
+            update = self.send(message)
+            self.check(f"Invalid message {message} is rejected", "error" in update, update)
+        update = self.send({"add": "nope"})
+        self.check("Rejected messages change nothing", update.get("total_cost") == before, (update, before))
+        self.check("Unknown ids are reported as ignored", update.get("ignored") == ["nope"], update)
+
+    def test_repeated_ids(self):
+        update = self.send({"reset": {"guest_count": 100, "service_ids": ["s1", "s1"]}})
+        self.selection.update(guest_count=100, venue_id=None, cuisine_ids=[], service_ids=["s1"])
+        self.check_total("Repeated ids are priced once in a session", update)
+
+    def run_all_tests(self):
+        self.test_deltas()
+        self.test_reset_with_add()
+        self.test_invalid_messages()
+        self.test_repeated_ids()
+        return self.failed == 0
+
+
+def main():
+    """Main test execution"""
+    print("🚀 Starting Budget Session Tests")
+    print("=" * 60)
+    with TestClient(server.app) as client:
+        with client.websocket_connect("/api/budget-session") as socket:
+            success = BudgetSessionTester(client, socket).run_all_tests()
+    if success:
+        print("\n🎉 Budget sessions match the calculate-budget endpoint.")
+        sys.exit(0)
+    print("\n💥 Some budget session checks failed. Check the details above.")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
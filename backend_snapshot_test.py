@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Catalog Snapshot Tests for Budget Wedding Planner
+Round-trips snapshot files and hands the shared catalog between a loader
+and a follower worker, both in this process
+"""
+
+import asyncio
+import copy
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+os.environ["CATALOG_SNAPSHOT_PATH"] = ""
+
+import server  # noqa: E402
+
+
+class SnapshotTester:
+    def __init__(self, directory):
+        self.directory = directory
+        self.passed = 0
+        self.failed = 0
+
+    def check(self, test_name, condition, details=None):
+        if condition:
+            self.passed += 1
+            print(f"✅ PASS: {test_name}")
+        else:
+            self.failed += 1
+            print(f"❌ FAIL: {test_name}")
+            if details is not None:
+                print(f"   Details: {details}")
+
+    def renamed_snapshot(self, version, name):
+        venues = copy.deepcopy(server.SEED_VENUES)
+        venues[0]["name"] = name
+        return server.CatalogSnapshot(version, venues, copy.deepcopy(server.SEED_CUISINES),
+                                      copy.deepcopy(server.SEED_SERVICES))
+
+    def test_round_trip(self):
+        path = os.path.join(self.directory, "round_trip.bin")
+        snapshot = self.renamed_snapshot(7, "Round Trip Hall")
+        server.write_snapshot_file(path, snapshot)
+        loaded = server.read_snapshot_file(path)
+        self.check("Version survives the round trip", loaded.version == 7, loaded.version)
+        self.check("Catalog survives the round trip",
+                   (loaded.venues, loaded.cuisines, loaded.services) == (snapshot.venues, snapshot.cuisines, snapshot.services))
+        self.check("ETag survives the round trip", loaded.etag == snapshot.etag, (loaded.etag, snapshot.etag))
+        for name in server.CatalogSnapshot.BODIES:
+            for encoding in (None, "gzip"):
+                self.check(f"{name} body ({encoding or 'identity'}) survives the round trip",
+                           bytes(loaded.body(name, encoding)[0]) == bytes(snapshot.body(name, encoding)[0]))
+        self.check("No file is left beside the snapshot", os.listdir(self.directory) == ["round_trip.bin"],
+                   os.listdir(self.directory))
+
+        with open(path, "r+b") as f:
+            f.write(b"NOTASNAP")
+        try:
+            server.read_snapshot_file(path)
+            self.check("A file without the magic is rejected", False)
+        except ValueError:
+            self.check("A file without the magic is rejected", True)
+
+    def write_heartbeat(self, shared, checked_at, stale):
+        with open(shared.heartbeat_path, "w") as f:
+            json.dump({"checked_at": checked_at, "stale": stale}, f)
+
+    def test_shared_file(self):
+        path = os.path.join(self.directory, "shared.bin")
+        loader = server.SharedCatalog(path)
+        follower = server.SharedCatalog(path)
+        self.check("First worker becomes the loader", loader.try_become_loader())
+        self.check("Second worker follows", not follower.try_become_loader())
+        self.check("No heartbeat means no live loader", follower.loader_status() == (False, False))
+
+        asyncio.run(loader.publish(self.renamed_snapshot(3, "Shared Hall")))
+        loader.beat(False)
+        self.check("Fresh heartbeat reports a live, current loader", follower.loader_status() == (True, False))
+        shared = follower.read(None)
+        self.check("Follower maps the published snapshot",
+                   shared is not None and shared.version == 3 and shared.venues[0]["name"] == "Shared Hall")
+        self.check("Unchanged file is not re-mapped", follower.read(shared) is shared)
+
+        loader.beat(True)
+        self.check("Loader reports it could not reach the store", follower.loader_status() == (True, True))
+        self.write_heartbeat(loader, time.time() - server.CATALOG_SHARED_MAX_AGE_SECONDS - 1, False)
+        self.check("Old heartbeat means the loader is hung", follower.loader_status()[0] is False)
+
+        loader._lock_file.close()
+        loader._lock_file = None
+        self.check("Follower takes over when the loader exits", follower.try_become_loader())
+        follower._lock_file.close()
+
+    async def get(self, cache):
+        # One request's view of the catalog
+        stats = server.RequestStats({})
+        token = server.current_request.set(stats)
+        try:
+            return await cache.get(), stats.stale
+        finally:
+            server.current_request.reset(token)
+
+    async def test_handoff(self):
+        store = server.MemoryRepository()
+        await store.upsert_catalog([server.with_capacity_bounds(venue) for venue in server.SEED_VENUES],
+                                   server.SEED_CUISINES, server.SEED_SERVICES)
+        store_version = await store.get_catalog_version()
+        server.repository = store
+        server.CATALOG_VERSION_CHECK_SECONDS = 0
+
+        path = os.path.join(self.directory, "handoff.bin")
+        loader = server.SharedCatalog(path)
+        loader.try_become_loader()
+        follower = server.SharedCatalog(path)
+        server.shared_catalog = follower
+        cache = server.CatalogCache()
+
+        await loader.publish(self.renamed_snapshot(store_version, "Published Hall"))
+        loader.beat(False)
+        snapshot, stale = await self.get(cache)
+        self.check("Follower serves the loader's snapshot",
+                   snapshot.venues[0]["name"] == "Published Hall" and not stale, (snapshot.venues[0]["name"], stale))
+
+        loader.beat(True)
+        snapshot, stale = await self.get(cache)
+        self.check("Follower marks responses stale while the loader is", snapshot.venues[0]["name"] == "Published Hall" and stale)
+
+        self.write_heartbeat(loader, time.time() - server.CATALOG_SHARED_MAX_AGE_SECONDS - 1, False)
+        await loader.publish(self.renamed_snapshot(store_version + 1, "Abandoned Hall"))
+        snapshot, stale = await self.get(cache)
+        self.check("Follower of a hung loader checks the store itself",
+                   snapshot.venues[0]["name"] != "Abandoned Hall" and not stale, (snapshot.venues[0]["name"], stale))
+
+        loader._lock_file.close()
+        await store.upsert_catalog([{**server.with_capacity_bounds(server.SEED_VENUES[0]), "name": "Store Hall"}], [], [])
+        await store.bump_catalog_version()
+        snapshot, stale = await self.get(cache)
+        self.check("Follower becomes the loader when the loader exits",
+                   follower.is_loader and snapshot.venues[0]["name"] == "Store Hall")
+        published = server.read_snapshot_file(path)
+        self.check("New loader publishes the store's catalog", published.venues[0]["name"] == "Store Hall")
+        self.check("New loader writes a current heartbeat", follower.loader_status() == (True, False))
+
+        async def unreachable():
+            raise OSError("store unreachable")
+        store.get_catalog_version = unreachable
+        snapshot, stale = await self.get(cache)
+        self.check("Loader serves its last snapshot stale when the store fails",
+                   snapshot.venues[0]["name"] == "Store Hall" and stale)
+        self.check("Loader reports the failure in its heartbeat", follower.loader_status() == (True, True))
+        follower._lock_file.close()
+
+    def run_all_tests(self):
+        self.test_round_trip()
+        self.test_shared_file()
+        asyncio.run(self.test_handoff())
+        return self.failed == 0
+
+
+def main():
+    """Main test execution"""
+    print("🚀 Starting Catalog Snapshot Tests")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as directory:
+        success = SnapshotTester(directory).run_all_tests()
+    if success:
+        print("\n🎉 Snapshot files and the shared catalog handoff work.")
+        sys.exit(0)
+    print("\n💥 Some snapshot checks failed. Check the details above.")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Storage Backend Contract Tests for Budget Wedding Planner
+Runs the same checks against every storage backend (memory, sqlite, mongo)
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+
+import server  # noqa: E402
+
+# Set TEST_MONGO_URL to also run the contract against a real Mongo database
+# (it is dropped afterwards)
+TEST_MONGO_URL = os.environ.get("TEST_MONGO_URL")
+
+
+class StorageContractTester:
+    def __init__(self, name, repository):
+        self.name = name
+        self.repository = repository
+        self.passed = 0
+        self.failed = 0
+
+    def check(self, test_name, condition, details=None):
+        if condition:
+            self.passed += 1
+            print(f"✅ PASS: [{self.name}] {test_name}")
+        else:
+            self.failed += 1
+            print(f"❌ FAIL: [{self.name}] {test_name}")
+            if details is not None:
+                print(f"   Details: {details}")
+
+    async def collect(self, name, catalog_filter):
+        return [item async for item in self.repository.iter_catalog(name, catalog_filter)]
+
+    async def test_seeding(self):
+        repo = self.repository
+        self.check("Fresh store has seed version 0", await repo.get_seed_version() == 0)
+        self.check("Seed lock can be acquired", await repo.acquire_seed_lock("a", 60))
+        self.check("Held seed lock is exclusive", not await repo.acquire_seed_lock("b", 60))
+        await repo.release_seed_lock("b")
+        self.check("Only the owner releases the lock", not await repo.acquire_seed_lock("b", 60))
+        await repo.release_seed_lock("a")
+        self.check("Released lock can be re-acquired", await repo.acquire_seed_lock("b", 60))
+        await repo.release_seed_lock("b")
+
+        venues = [server.with_capacity_bounds(venue) for venue in server.SEED_VENUES]
+        await repo.upsert_catalog(venues, server.SEED_CUISINES, server.SEED_SERVICES)
+        await repo.upsert_catalog(venues, server.SEED_CUISINES, server.SEED_SERVICES)
+        await repo.set_seed_version(server.SEED_VERSION)
+        self.check("Seed version is stored", await repo.get_seed_version() == server.SEED_VERSION)
+
+    async def test_catalog(self):
+        repo = self.repository
+        venues, cuisines, services = await repo.load_catalog()
+        self.check("Upserts are idempotent", (len(venues), len(cuisines), len(services)) == (4, 5, 12),
+                   (len(venues), len(cuisines), len(services)))
+        self.check("Query-only fields are not returned", all("max_capacity" not in v for v in venues))
+        self.check("Documents carry no storage ids", all("_id" not in item for item in venues + cuisines + services))
+
+        await repo.upsert_catalog([{**server.with_capacity_bounds(server.SEED_VENUES[0]), "price": 160000}], [], [])
+        venues, _, _ = await repo.load_catalog()
+        self.check("Upsert updates existing items", {v["id"]: v["price"] for v in venues}["v1"] == 160000)
+
+        version = await repo.get_catalog_version()
+        await repo.bump_catalog_version()
+        self.check("Catalog version increments", await repo.get_catalog_version() == version + 1)
+
+    async def test_catalog_queries(self):
+        capacity = await self.collect("venues", server.CatalogFilter("price", min_capacity=400))
+        self.check("min_capacity filter", sorted(v["id"] for v in capacity) == ["v2", "v3"], capacity)
+
+        top = await self.collect("venues", server.CatalogFilter("price", sort_field="price", descending=True, limit=2))
+        self.check("Descending sort with limit", [v["id"] for v in top] == ["v3", "v2"], top)
+
+        seen = []
+        after = None
+        while True:
+            page = await self.collect("service_categories", server.CatalogFilter(
+                "price", sort_field="price", limit=5, after=after))
+            seen += [s["id"] for s in page]
+            if len(page) < 5:
+                break
+            after = (page[-1]["price"], page[-1]["id"])
+        self.check("Keyset pagination visits every item once", sorted(seen) == sorted(s["id"] for s in server.SEED_SERVICES), seen)
+
+        veg = await self.collect("cuisine_options", server.CatalogFilter(
+            "price_per_plate", equals={"cuisine_type": "Vegetarian"}, max_price=350, fields=["name"]))
+        self.check("Equality, price and projection", veg and all(set(c) <= {"id", "name"} for c in veg)
+                   and sorted(c["id"] for c in veg) == ["c2", "c5"], veg)
+
+        venues, cuisines, services = await self.repository.find_prices("v1", ["c5", "c5", "missing"], ["s1", "s3"])
+        self.check("Price lookup by ids", (len(venues), len(cuisines), len(services)) == (1, 1, 2))
+
+    async def test_plans(self):
+        repo = self.repository
+        await repo.save_plan("p1", {"plan_id": "p1", "guest_count": 100, "total_budget": 500000, "venue": None})
+        await repo.save_plan("p1", {"plan_id": "p1", "guest_count": 120})
+        plan = await repo.get_plan("p1")
+        self.check("Plan saves merge like $set", plan == {"plan_id": "p1", "guest_count": 120,
+                                                           "total_budget": 500000, "venue": None}, plan)
+        self.check("Missing plan is None", await repo.get_plan("missing") is None)
+
+        plans = [{"plan_id": f"bulk{i}", "guest_count": i, "total_budget": 1000 * i} for i in range(5)]
+        self.check("Bulk save reports no errors", await repo.bulk_save_plans(plans) == [])
+        exported = [plan async for plan in repo.iter_plans(2)]
+        self.check("Plan export sees every plan", len(exported) == 6, len(exported))
+
+    async def test_plan_listing(self):
+        repo = self.repository
+        plans = [{"plan_id": f"list{i:02d}", "guest_count": 100 + 10 * i, "total_budget": 100000 * i,
+                  "updated_at": f"2024-01-{1 + i // 2:02d}T00:00:00", "venue": {"id": "v1"}} for i in range(20)]
+        await repo.bulk_save_plans(plans)
+        expected = sorted((p for p in plans if 150 <= p["guest_count"] <= 250 and p["total_budget"] >= 700000),
+                          key=lambda p: (p["updated_at"], p["plan_id"]), reverse=True)
+
+        seen = []
+        after = None
+        while True:
+            page = await repo.list_plans(server.PlanFilter(min_guests=150, max_guests=250, min_budget=700000,
+                                                           after=after, limit=3))
+            seen += page
+            if len(page) < 3:
+                break
+            after = (page[-1]["updated_at"], page[-1]["plan_id"])
+        self.check("Plan listing pages newest first through the filter",
+                   [p["plan_id"] for p in seen] == [p["plan_id"] for p in expected], [p["plan_id"] for p in seen])
+        self.check("Plan listing returns summary fields only",
+                   all(set(p) <= set(server.PLAN_SUMMARY_FIELDS) for p in seen), seen[:1])
+
+    async def run_all_tests(self):
+        await self.test_seeding()
+        await self.test_catalog()
+        await self.test_catalog_queries()
+        await self.test_plans()
+        await self.test_plan_listing()
+        return self.failed == 0
+
+
+async def run_backends():
+    backends = [("memory", server.MemoryRepository())]
+    sqlite_dir = tempfile.TemporaryDirectory()
+    backends.append(("sqlite", server.SQLiteRepository(os.path.join(sqlite_dir.name, "contract.db"))))
+    mongo = None
+    if TEST_MONGO_URL:
+        mongo = server.MongoRepository(TEST_MONGO_URL, serverSelectionTimeoutMS=2000)
+        await mongo.client.drop_database(mongo.db.name)
+        await mongo.ensure_indexes(server.INDEX_SPEC)
+        backends.append(("mongo", mongo))
+    else:
+        print("ℹ️  TEST_MONGO_URL not set; skipping the mongo backend")
+
+    success = True
+    try:
+        for name, repository in backends:
+            success = await StorageContractTester(name, repository).run_all_tests() and success
+    finally:
+        if mongo is not None:
+            await mongo.client.drop_database(mongo.db.name)
+        sqlite_dir.cleanup()
+    return success
+
+
+def main():
+    """Main test execution"""
+    print("🚀 Starting Storage Backend Contract Tests")
+    print("=" * 60)
+    if asyncio.run(run_backends()):
+        print("\n🎉 All storage backends satisfy the contract.")
+        sys.exit(0)
+    print("\n💥 Some storage backend checks failed. Check the details above.")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
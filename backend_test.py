@@ -334,6 +334,77 @@ class WeddingPlannerAPITester:
         
         return all_passed
     
+    def test_batch_matches_single(self):
+        """Test POST /api/calculate-budget/batch returns the single endpoint's totals"""
+        scenarios = [
+            {"guest_count": 200, "venue_id": "v1", "cuisine_ids": ["c5"], "service_ids": ["s1", "s3", "s7", "s9"]},
+            {"guest_count": 500, "venue_id": "v3", "cuisine_ids": ["c4", "c4"], "service_ids": ["s2", "s2", "s12"]},
+            {"guest_count": 0, "venue_id": "missing", "cuisine_ids": ["c1", "c3"], "service_ids": []},
+            {"guest_count": 1000000, "venue_id": None, "cuisine_ids": ["c4"], "service_ids": None},
+        ]
+        
+        try:
+            expected = []
+            for scenario in scenarios:
+                response = requests.post(f"{self.base_url}/api/calculate-budget", json=scenario, timeout=10)
+                if response.status_code != 200:
+                    self.log_test("Batch Matches Single", False, f"HTTP {response.status_code}: {response.text}")
+                    return False
+                expected.append(response.json()["total_cost"])
+            
+            response = requests.post(f"{self.base_url}/api/calculate-budget/batch",
+                                     json={"scenarios": scenarios}, timeout=10)
+            if response.status_code != 200:
+                self.log_test("Batch Matches Single", False, f"HTTP {response.status_code}: {response.text}")
+                return False
+            totals = [result["total_cost"] for result in response.json()["results"]]
+            if totals != expected:
+                self.log_test("Batch Matches Single", False, f"Batch totals {totals} differ from single {expected}")
+                return False
+            
+            response = requests.post(f"{self.base_url}/api/calculate-budget/batch",
+                                     json={"scenarios": [{"guest_count": 2 * 10**16, "cuisine_ids": ["c4"]}]}, timeout=10)
+            if response.status_code != 422:
+                self.log_test("Batch Matches Single", False, f"Oversized guest count: expected HTTP 422, got {response.status_code}")
+                return False
+            
+            self.log_test("Batch Matches Single", True, f"Batch totals match the single endpoint for {len(scenarios)} scenarios")
+            return True
+        except requests.exceptions.RequestException as e:
+            self.log_test("Batch Matches Single", False, f"Connection error: {str(e)}")
+            return False
+    
+    def test_cost_curve_matches_single(self):
+        """Test POST /api/cost-curve totals against the single endpoint and its guest range bounds"""
+        selection = {"venue_id": "v2", "cuisine_ids": ["c4"], "service_ids": ["s1", "s5"]}
+        
+        try:
+            response = requests.post(f"{self.base_url}/api/cost-curve",
+                                     json={**selection, "min_guests": 100, "max_guests": 400, "step": 150}, timeout=10)
+            if response.status_code != 200:
+                self.log_test("Cost Curve", False, f"HTTP {response.status_code}: {response.text}")
+                return False
+            curve = response.json()
+            for guest_count, total_cost in zip(curve["guest_counts"], curve["total_cost"]):
+                single = requests.post(f"{self.base_url}/api/calculate-budget",
+                                       json={**selection, "guest_count": guest_count}, timeout=10).json()
+                if single["total_cost"] != total_cost:
+                    self.log_test("Cost Curve", False, f"{guest_count} guests: curve ₹{total_cost:,}, single ₹{single['total_cost']:,}")
+                    return False
+            
+            # Guest counts this large would wrap the int64 curve arithmetic
+            response = requests.post(f"{self.base_url}/api/cost-curve",
+                                     json={**selection, "min_guests": 10**17, "max_guests": 10**17 + 100, "step": 1}, timeout=10)
+            if response.status_code != 422:
+                self.log_test("Cost Curve", False, f"Oversized guest range: expected HTTP 422, got {response.status_code}")
+                return False
+            
+            self.log_test("Cost Curve", True, f"Curve matches the single endpoint at {len(curve['guest_counts'])} guest counts")
+            return True
+        except requests.exceptions.RequestException as e:
+            self.log_test("Cost Curve", False, f"Connection error: {str(e)}")
+            return False
+    
     def run_all_tests(self):
         """Run all API tests"""
         print("🚀 Starting Budget Wedding Planner Backend API Tests")
@@ -348,10 +419,14 @@ class WeddingPlannerAPITester:
         # Only test budget calculation if basic endpoints work
         budget_ok = False
         edge_cases_ok = False
+        batch_ok = False
+        curve_ok = False
         
         if venues_ok and cuisines_ok and services_ok:
             budget_ok = self.test_budget_calculation_scenarios()
             edge_cases_ok = self.test_budget_calculation_edge_cases()
+            batch_ok = self.test_batch_matches_single()
+            curve_ok = self.test_cost_curve_matches_single()
         else:
             self.log_test("Budget Calculation", False, "Skipped due to failed prerequisite tests")
         
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
 import { Heart, Users, MapPin, Utensils, Camera, Sparkles, Music, Palette, Mail, Car, Flower2, CheckCircle2, IndianRupee, TrendingUp, Gift, Calendar } from 'lucide-react';
 import './App.css';
@@ -18,26 +18,59 @@ function App() {
   const [services, setServices] = useState({});
   const [calculatedBudget, setCalculatedBudget] = useState(null);
 
+  // Live budget session: only deltas go to the server, which answers with changed lines
+  const sessionRef = useRef(null);
+  const sentSelectionRef = useRef(null);
+  const sessionLinesRef = useRef({});
+  const sessionOrderRef = useRef([]);
+  const selectionRef = useRef(null);
+  selectionRef.current = {
+    guestCount,
+    venueId: selectedVenue?.id || null,
+    cuisineIds: selectedCuisines.map(c => c.id),
+    serviceIds: selectedServices.map(s => s.id)
+  };
+
   useEffect(() => {
     fetchData();
+    const socket = new WebSocket(`${API_URL.replace(/^http/, 'ws')}/api/budget-session`);
+    socket.onopen = () => {
+      sessionRef.current = socket;
+      const { venueId, cuisineIds, serviceIds } = selectionRef.current;
+      if (venueId || cuisineIds.length > 0 || serviceIds.length > 0) {
+        syncBudgetSession();
+      }
+    };
+    socket.onmessage = (event) => applySessionUpdate(JSON.parse(event.data));
+    socket.onclose = () => {
+      sessionRef.current = null;
+      sentSelectionRef.current = null;
+    };
+    return () => socket.close();
   }, []);
 
   useEffect(() => {
     if (selectedVenue || selectedCuisines.length > 0 || selectedServices.length > 0) {
-      calculateBudget();
+      if (sessionRef.current) {
+        syncBudgetSession();
+      } else {
+        calculateBudget();
+      }
     }
   }, [selectedVenue, selectedCuisines, selectedServices, guestCount]);
 
   const fetchData = async () => {
     try {
-      const [venuesRes, cuisinesRes, servicesRes] = await Promise.all([
-        axios.get(`${API_URL}/api/venues`),
-        axios.get(`${API_URL}/api/cuisine-options`),
-        axios.get(`${API_URL}/api/services`)
-      ]);
-      setVenues(venuesRes.data.venues);
-      setCuisines(cuisinesRes.data.cuisines);
-      setServices(servicesRes.data.services);
+      // One request for the whole catalog; the browser revalidates it with
+      // its ETag and reuses the cached copy on a 304
+      const { data } = await axios.get(`${API_URL}/api/bootstrap`);
+      const servicesByCategory = {};
+      data.services.forEach((service) => {
+        (servicesByCategory[service.category] = servicesByCategory[service.category] || []).push(service);
+      });
+      setVenues(data.venues);
+      setCuisines(data.cuisines);
+      setServices(servicesByCategory);
     } catch (error) {
       console.error('Error fetching data:', error);
     }
@@ -57,6 +90,66 @@ function App() {
     }
   };
 
+  const syncBudgetSession = () => {
+    const current = selectionRef.current;
+    const sent = sentSelectionRef.current;
+    let message;
+    if (!sent) {
+      message = {
+        reset: {
+          guest_count: current.guestCount,
+          venue_id: current.venueId,
+          cuisine_ids: current.cuisineIds,
+          service_ids: current.serviceIds
+        }
+      };
+    } else {
+      message = {};
+      if (current.guestCount !== sent.guestCount) {
+        message.guest_count = current.guestCount;
+      }
+      if (current.venueId !== sent.venueId) {
+        message.venue_id = current.venueId;
+      }
+      const currentIds = [...current.cuisineIds, ...current.serviceIds];
+      const sentIds = [...sent.cuisineIds, ...sent.serviceIds];
+      const added = currentIds.filter(id => !sentIds.includes(id));
+      const removed = sentIds.filter(id => !currentIds.includes(id));
+      if (added.length > 0) {
+        message.add = added;
+      }
+      if (removed.length > 0) {
+        message.remove = removed;
+      }
+      if (Object.keys(message).length === 0) {
+        return;
+      }
+    }
+    sentSelectionRef.current = current;
+    sessionRef.current.send(JSON.stringify(message));
+  };
+
+  const applySessionUpdate = (update) => {
+    if (update.error) {
+      console.error('Budget session error:', update.error);
+      // The server did not apply the last delta; resend the full selection next time
+      sentSelectionRef.current = null;
+      return;
+    }
+    const lines = update.reset ? {} : { ...sessionLinesRef.current };
+    update.removed.forEach(key => delete lines[key]);
+    Object.assign(lines, update.lines);
+    sessionLinesRef.current = lines;
+    if (update.order) {
+      sessionOrderRef.current = update.order;
+    }
+    setCalculatedBudget({
+      total_cost: update.total_cost,
+      guest_count: update.guest_count,
+      breakdown: sessionOrderRef.current.map(key => lines[key]).filter(Boolean)
+    });
+  };
+
   const formatCurrency = (amount) => {
     if (amount >= 100000) {
       return `₹${(amount / 100000).toFixed(1)}L`;